@@ -1,8 +1,10 @@
 # screens/chat.py
 import streamlit as st
-from utils.query import run_similarity_search, query_ollama
+from utils.query import run_similarity_search
+from common.ollama import stream_ollama
 from utils.database import load_data_from_snowflake, save_preferences
 from utils.planner import display_preference_based_recommendations  # Added by Deepana
+from common import tracing
 
 def screen_2():
     st.title("🧚‍♀️ Chat with Street Fairy")
@@ -73,73 +75,81 @@ def screen_2():
 
     # -------------- Handle user input --------------
     if user_message:
-        st.session_state.chat_history.append({"role": "user", "content": user_message})
-
-        if any(x in user_message.lower() for x in ["not a fan", "don't like", "dislike", "another", "next"]):
-            if st.session_state.remaining_recs:
-                next_suggestion = st.session_state.remaining_recs.pop(0)
-                st.session_state.feedback["disliked"].update(next_suggestion["CATEGORIES"].split(","))
-
-                retry_prompt = f"""
-                You are Street Fairy 🧚‍♀️. The last suggestion wasn't a hit.
-                Here's another business to consider:
-
-                - {next_suggestion['NAME']} ({next_suggestion['CATEGORIES']} in {next_suggestion['CITY']}, {next_suggestion['STATE']})
-
-                Please describe it warmly and concisely without inventing anything.
-                """
-                with st.spinner("🧚‍♀️ Finding another magical place..."):
-                    response = query_ollama(retry_prompt, model="mistral")
-
-                st.session_state.chat_history.append({"role": "assistant", "content": response})
-                st.rerun()  # Refresh the page to show new message
-                return
-            else:
-                st.session_state.chat_history.append({"role": "assistant", "content": "🧚‍♀️ No more suggestions left! Try a different query."})
+        with tracing.turn("faiss"):
+            st.session_state.chat_history.append({"role": "user", "content": user_message})
+            with st.chat_message("user"):
+                st.markdown(user_message)
+
+            if any(x in user_message.lower() for x in ["not a fan", "don't like", "dislike", "another", "next"]):
+                if st.session_state.remaining_recs:
+                    next_suggestion = st.session_state.remaining_recs.pop(0)
+                    st.session_state.feedback["disliked"].update(next_suggestion["CATEGORIES"].split(","))
+
+                    with tracing.span("prompt"):
+                        retry_prompt = f"""
+                        You are Street Fairy 🧚‍♀️. The last suggestion wasn't a hit.
+                        Here's another business to consider:
+
+                        - {next_suggestion['NAME']} ({next_suggestion['CATEGORIES']} in {next_suggestion['CITY']}, {next_suggestion['STATE']})
+
+                        Please describe it warmly and concisely without inventing anything.
+                        """
+                    # Stream the answer in as it is generated
+                    with st.chat_message("assistant"):
+                        response = st.write_stream(stream_ollama(retry_prompt, model="mistral"))
+
+                    st.session_state.chat_history.append({"role": "assistant", "content": response})
+                    st.rerun()  # Refresh the page to show new message
+                    return
+                else:
+                    st.session_state.chat_history.append({"role": "assistant", "content": "🧚‍♀️ No more suggestions left! Try a different query."})
+                    st.rerun()
+                    return
+
+            # New query flow
+            df=load_data_from_snowflake()
+            with st.spinner("🧚‍♀️ Street Fairy is thinking..."):
+                results = run_similarity_search(user_location,user_message,df)
+
+            if results.empty:
+                st.session_state.chat_history.append({"role": "assistant", "content": "⚠️ No good results found. Try something different?"})
                 st.rerun()
                 return
 
-        # New query flow
-        df=load_data_from_snowflake()
-        with st.spinner("🧚‍♀️ Street Fairy is thinking..."):
-            results = run_similarity_search(user_location,user_message,df)
+            with tracing.span("prompt") as span:
+                top_results = results[:5]
+                span["results"] = len(results)
+                st.session_state.remaining_recs = results[5:]
 
-        if results.empty:
-            st.session_state.chat_history.append({"role": "assistant", "content": "⚠️ No good results found. Try something different?"})
-            st.rerun()
-            return
+                business_str = "\n".join([
+                    f"- {b['NAME']} ({b['CATEGORIES']} in {b.get('CITY', '')}, {b['STATE']})"
+                    for _, b in top_results.iterrows()
+                ])
 
-        top_results = results[:5]
-        st.session_state.remaining_recs = results[5:]
+                recommendation_prompt = f"""
+                You are Street Fairy 🧚‍♀️ suggesting lovely places.
 
-        business_str = "\n".join([
-            f"- {b['NAME']} ({b['CATEGORIES']} in {b.get('CITY', '')}, {b['STATE']})"
-            for _, b in top_results.iterrows()
-        ])
+                The user asked: "{user_message}"
+                Here are 5 real businesses found:
 
-        recommendation_prompt = f"""
-        You are Street Fairy 🧚‍♀️ suggesting lovely places.
+                {business_str}
 
-        The user asked: "{user_message}"
-        Here are 5 real businesses found:
-
-        {business_str}
-
-        ✅ Recommend 2-3 options warmly.
-        ✅ Mention names, locations, and something special about them.
-        🚫 Do not invent fake businesses.
-        """
+                ✅ Recommend 2-3 options warmly.
+                ✅ Mention names, locations, and something special about them.
+                🚫 Do not invent fake businesses.
+                """
 
-        try:
-            with st.spinner("🧚‍♀️ Preparing magic suggestions..."):
-                recommendation = query_ollama(recommendation_prompt, model="mistral")
+            try:
+                # Stream the answer in as it is generated
+                with st.chat_message("assistant"):
+                    recommendation = st.write_stream(stream_ollama(recommendation_prompt, model="mistral"))
 
-            st.session_state.chat_history.append({"role": "assistant", "content": recommendation})
-            st.rerun()
+                st.session_state.chat_history.append({"role": "assistant", "content": recommendation})
+                st.rerun()
 
-        except Exception as e:
-            st.session_state.chat_history.append({"role": "assistant", "content": f"⚠️ Oops, Fairy magic failed: {e}"})
-            st.rerun()
+            except Exception as e:
+                st.session_state.chat_history.append({"role": "assistant", "content": f"⚠️ Oops, Fairy magic failed: {e}"})
+                st.rerun()
 
     # 🌟 Show preference-based recommendations
     st.session_state["user_location"] = user_location 
@@ -1,5 +1,7 @@
 import streamlit as st
 from utils.database import get_snowflake_connection
+from common.embeddings import warm_up
+from utils.query import MODEL_NAME
 
 def screen_0():
     st.title("🔐 Welcome to Street Fairy")
@@ -69,4 +71,7 @@ def screen_0():
                 except Exception as e:
                     st.error(f"User ID already exists or failed to register: {e}")
             else:
-                st.warning("Please complete all fields.")
\ No newline at end of file
+                st.warning("Please complete all fields.")
+
+    # Load the embedding model while the user is still on this screen
+    warm_up(MODEL_NAME)
@@ -1,8 +1,12 @@
 import snowflake.connector
 import os
 import json
+import numpy as np
 import pandas as pd
+import faiss
 import streamlit as st
+from common import tracing
+from utils.snapshot import read_snapshot, sync_snapshot
 
 def get_snowflake_connection():
     key_path = os.path.join(os.path.dirname(__file__), "..", "..", "key.json")
@@ -10,19 +14,34 @@ def get_snowflake_connection():
         creds = json.load(f)
     return snowflake.connector.connect(**creds)
 
-@st.cache_data ###Added
+def _read_or_sync_snapshot(with_embeddings=True):
+    # Only the very first start, before any snapshot exists, pulls the table from Snowflake
+    snapshot = read_snapshot(with_embeddings=with_embeddings)
+    if snapshot is None:
+        sync_snapshot(full=True)
+        snapshot = read_snapshot(with_embeddings=with_embeddings)
+    return snapshot
+
+@st.cache_resource(show_spinner=False)
+def load_business_data():
+    """Business metadata plus its (N, 384) float32 embedding matrix, from the local snapshot (see utils/snapshot.py).
+
+    The matrix is L2-normalized and C-contiguous, so FAISS and NumPy use it as is. Row i of it
+    belongs to row i of the metadata.
+    """
+    meta, embeddings = _read_or_sync_snapshot()
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    faiss.normalize_L2(embeddings)
+    return meta, embeddings
+
+@tracing.traced("load_data")
+@st.cache_resource(show_spinner=False)
 def load_data_from_snowflake():
-    conn = get_snowflake_connection()
-    cursor = conn.cursor()
-    query = """
-        SELECT BUSINESS_ID, NAME, CITY, STATE, LATITUDE, LONGITUDE, CATEGORIES, FLATTENED_ATTRIBUTES,
-        PARSE_JSON(embedding)::VECTOR(FLOAT, 384) AS EMBEDDING
-        FROM BUSINESS_EMBEDDINGS
+    """Business metadata only, shared by every session in the process.
+
+    Searches go through the FAISS index, so the app never holds the float32 matrix itself.
     """
-    cursor.execute(query)
-    df = cursor.fetch_pandas_all()
-    conn.close()
-    return df
+    return _read_or_sync_snapshot(with_embeddings=False)[0]
 
 def save_preferences():
     try:
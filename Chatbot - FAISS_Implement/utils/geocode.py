@@ -0,0 +1,206 @@
+# utils/geocode.py
+#
+# Offline gazetteer built from ENGINEERED_BUSINESSES at index time, so a location
+# like "Tampa", "Tampa, FL" or "19103" resolves locally instead of through Nominatim.
+# Anything the gazetteer cannot place (e.g. a street address) goes to Nominatim,
+# unless GEOCODE_ALLOW_NETWORK=0.
+
+import os
+import re
+import json
+import difflib
+import streamlit as st
+from common import tracing
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
+# Stored next to the FAISS index (FAISS_INDEX_DIR, see utils/index.py)
+GAZETTEER_PATH = os.path.join(os.environ.get("FAISS_INDEX_DIR", os.path.join(ROOT_DIR, ".faiss_index")), "gazetteer.json")
+ALLOW_NETWORK = os.environ.get("GEOCODE_ALLOW_NETWORK", "1") == "1"
+
+# States we have businesses for
+STATE_NAMES = {
+    "pennsylvania": "PA",
+    "florida": "FL",
+    "tennessee": "TN",
+    "indiana": "IN",
+    "missouri": "MO",
+}
+
+ZIP_PATTERN = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+
+
+def fetch_places():
+    """Business counts and mean coordinates per (city, state, zip), aggregated in Snowflake."""
+    from utils.database import get_snowflake_connection
+
+    conn = get_snowflake_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT CITY, STATE, POSTAL_CODE,
+               AVG(LATITUDE) AS LATITUDE, AVG(LONGITUDE) AS LONGITUDE, COUNT(*) AS BUSINESSES
+        FROM ENGINEERED_BUSINESSES
+        WHERE LATITUDE IS NOT NULL AND LONGITUDE IS NOT NULL
+        GROUP BY CITY, STATE, POSTAL_CODE
+    """)
+    places = cursor.fetch_pandas_all()
+    conn.close()
+    return places
+
+
+def _centroids(places, keys):
+    # Business-weighted centroid of each group
+    weighted = places.assign(
+        LAT_W=places["LATITUDE"] * places["BUSINESSES"],
+        LON_W=places["LONGITUDE"] * places["BUSINESSES"],
+    )
+    grouped = weighted.groupby(keys)[["LAT_W", "LON_W", "BUSINESSES"]].sum()
+    return {
+        key: [row.LAT_W / row.BUSINESSES, row.LON_W / row.BUSINESSES, int(row.BUSINESSES)]
+        for key, row in grouped.iterrows()
+    }
+
+
+def build_gazetteer(places, path=GAZETTEER_PATH):
+    """Write city, zip and state centroids from fetch_places() output to the gazetteer file."""
+    places = places.dropna(subset=["LATITUDE", "LONGITUDE"]).copy()
+    places["LATITUDE"] = places["LATITUDE"].astype(float)
+    places["LONGITUDE"] = places["LONGITUDE"].astype(float)
+    places["CITY"] = places["CITY"].fillna("").str.strip().str.lower()
+    places["STATE"] = places["STATE"].fillna("").str.strip().str.upper()
+    places["POSTAL_CODE"] = places["POSTAL_CODE"].fillna("").astype(str).str.strip().str[:5]
+
+    cities = _centroids(places[places["CITY"] != ""], ["CITY", "STATE"])
+    gazetteer = {
+        "cities": {f"{city}|{state}": value for (city, state), value in cities.items()},
+        "zips": _centroids(places[places["POSTAL_CODE"].str.fullmatch(r"\d{5}")], "POSTAL_CODE"),
+        "states": _centroids(places[places["STATE"] != ""], "STATE"),
+    }
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(gazetteer, f)
+    os.replace(tmp_path, path)
+    return gazetteer
+
+
+def load_gazetteer(path=GAZETTEER_PATH):
+    # Not cached while missing, so a gazetteer built after startup is picked up by the next search
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No gazetteer found at {path}. Run `python -m utils.index` first.")
+    return _read_gazetteer(path, os.path.getmtime(path))
+
+
+@st.cache_resource(show_spinner=False)
+def _read_gazetteer(path, mtime):
+    with open(path, "r") as f:
+        gazetteer = json.load(f)
+
+    # City name -> candidates in every state, most businesses first, for "Tampa" without a state
+    by_name = {}
+    for key, (lat, lon, count) in gazetteer["cities"].items():
+        city, state = key.split("|")
+        by_name.setdefault(city, []).append((count, state, lat, lon))
+    for candidates in by_name.values():
+        candidates.sort(reverse=True)
+    gazetteer["by_name"] = by_name
+    return gazetteer
+
+
+def _parse_state(text):
+    text = text.strip().lower()
+    if text in STATE_NAMES:
+        return STATE_NAMES[text]
+    if len(text) == 2 and text.isalpha():
+        return text.upper()
+    return None
+
+
+def resolve_location(location_query, gazetteer=None):
+    """Resolve a city, "city, state", state or zip to (lat, lon) from the gazetteer, or None.
+
+    An explicit state has to match: "Tampa, PA" is None rather than Tampa, FL.
+    """
+    if not location_query:
+        return None
+    gazetteer = gazetteer or load_gazetteer()
+
+    # A trailing country needs a separator, so "Emmaus" and "Columbus" keep their "us"
+    text = re.sub(r"(?:,\s*|\s+)(?:usa|us|united states)$", "", location_query.strip().lower())
+
+    # Zip code
+    zip_match = ZIP_PATTERN.search(text)
+    if zip_match and zip_match.group(1) in gazetteer["zips"]:
+        lat, lon, _ = gazetteer["zips"][zip_match.group(1)]
+        return lat, lon
+    text = ZIP_PATTERN.sub("", text).strip(" ,")
+
+    # "City, ST" / "City ST" / "City" / "State"
+    parts = [p.strip() for p in text.split(",") if p.strip()]
+    if not parts:
+        return None
+    city, state = parts[0], _parse_state(parts[1]) if len(parts) > 1 else None
+    if state is None and len(parts) == 1:
+        words = city.rsplit(" ", 1)
+        if len(words) == 2 and _parse_state(words[1]) and words[0] in gazetteer["by_name"]:
+            city, state = words[0], _parse_state(words[1])
+
+    if len(parts) == 1 and city not in gazetteer["by_name"]:
+        only_state = _parse_state(city)
+        if only_state in gazetteer["states"]:
+            lat, lon, _ = gazetteer["states"][only_state]
+            return lat, lon
+
+    candidates = gazetteer["by_name"].get(city)
+    if candidates is None:
+        # Near misses like "Philadelpia" or "St Louis"
+        close = difflib.get_close_matches(city, gazetteer["by_name"].keys(), n=1, cutoff=0.8)
+        if not close:
+            return None
+        candidates = gazetteer["by_name"][close[0]]
+
+    if state:
+        candidates = [c for c in candidates if c[1] == state]
+        if not candidates:
+            return None
+    _, _, lat, lon = candidates[0]
+    return lat, lon
+
+
+@st.cache_resource(show_spinner=False)
+def load_geolocator():
+    from geopy.geocoders import Nominatim
+    return Nominatim(user_agent="geopyApp", timeout=5)
+
+
+@tracing.traced("geocode")
+def get_lat_lon(location_query, allow_network=None):
+    """Get latitude and longitude from the local gazetteer, falling back to Nominatim when allowed.
+
+    allow_network defaults to GEOCODE_ALLOW_NETWORK.
+    """
+    if allow_network is None:
+        allow_network = ALLOW_NETWORK
+    try:
+        lat_lon = resolve_location(location_query)
+    except FileNotFoundError as e:
+        if not allow_network:
+            raise
+        print(f"⚠️ {e} Geocoding through Nominatim meanwhile.")
+        lat_lon = None
+    if lat_lon is not None:
+        tracing.record(geocoder="gazetteer")
+        return lat_lon
+    if not allow_network:
+        tracing.record(geocoder=None)
+        return None, None
+
+    tracing.record(geocoder="nominatim")
+    try:
+        location = load_geolocator().geocode(location_query)
+        if location:
+            return location.latitude, location.longitude
+    except Exception:
+        return None, None
+    return None, None
@@ -0,0 +1,285 @@
+# utils/index.py
+#
+# Offline build + per-process loading of the business FAISS index.
+# Build (from the "Chatbot - FAISS_Implement" folder):  python -m utils.index [--kind sq8] [--report]
+# The build syncs the local snapshot first and indexes the snapshot rows.
+
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+import faiss
+import streamlit as st
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
+# FAISS_INDEX_DIR points the app at another index (e.g. benchmark/ builds one per dataset)
+INDEX_DIR = os.environ.get("FAISS_INDEX_DIR", os.path.join(ROOT_DIR, ".faiss_index"))
+
+# Index kinds selectable at build time, as FAISS index_factory strings (inner product).
+# Compare them with `python -m utils.index --report` before switching.
+INDEX_KINDS = {
+    "flat": "Flat",             # float32, exact; 1536 bytes per business
+    "fp16": "SQfp16",           # float16; 768 bytes
+    "sq8": "SQ8",               # 8-bit scalar quantizer; 384 bytes
+    "pq": "PQ48",               # 48 x 8-bit product quantizer codes; 48 bytes
+    "hnsw": "HNSW32",           # approximate graph search over float32 vectors
+    "ivf": "IVF{nlist},Flat",   # approximate: only the nprobe closest of nlist clusters are scanned
+}
+DEFAULT_KIND = os.environ.get("FAISS_INDEX_KIND", "flat")
+
+# Search-time recall/latency knobs for the approximate kinds (ignored by the others)
+DEFAULT_EF_SEARCH = int(os.environ.get("FAISS_EF_SEARCH", "64"))
+DEFAULT_NPROBE = int(os.environ.get("FAISS_NPROBE", "16"))
+HNSW_EF_CONSTRUCTION = 80
+
+
+def read_manifest(index_dir=INDEX_DIR):
+    path = os.path.join(index_dir, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_manifest(manifest, index_dir=INDEX_DIR):
+    # Write-then-rename so a running app never sees a half written manifest
+    path = os.path.join(index_dir, "manifest.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def make_index(embeddings, kind=DEFAULT_KIND):
+    """Train (if the kind needs it) and fill an index of the given INDEX_KINDS kind."""
+    # ~4 sqrt(N) clusters, keeping at least 39 training points per cluster
+    nlist = max(1, min(int(4 * np.sqrt(len(embeddings))), len(embeddings) // 39))
+    spec = INDEX_KINDS[kind].format(nlist=nlist)
+
+    index = faiss.index_factory(embeddings.shape[1], spec, faiss.METRIC_INNER_PRODUCT)
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    if isinstance(index, faiss.IndexPQ):
+        # index_factory turns on polysemous training (minutes, whatever the data size),
+        # which only the unused Hamming-filtered search types need
+        index.do_polysemous_training = False
+    if not index.is_trained:
+        index.train(embeddings)
+    index.add(embeddings)
+    return index
+
+
+def build_index(df, embeddings, kind=DEFAULT_KIND, index_dir=INDEX_DIR):
+    """Build an inner-product index over the L2-normalized float32 embeddings (row i <-> df row i) and save it as the next version."""
+    index = make_index(embeddings, kind)
+
+    os.makedirs(index_dir, exist_ok=True)
+    previous = read_manifest(index_dir) or {"version": 0}
+    version = previous["version"] + 1
+
+    index_file = f"business_v{version}.faiss"
+    ids_file = f"business_v{version}_ids.npy"
+    faiss.write_index(index, os.path.join(index_dir, index_file))
+    # Row id i of the index is business_ids[i]
+    np.save(os.path.join(index_dir, ids_file), df["BUSINESS_ID"].to_numpy(dtype=str))
+    # ...and sits at coords[i], so radius queries can return index rows directly
+    coords_file = f"business_v{version}_coords.npy"
+    np.save(os.path.join(index_dir, coords_file), df[["LATITUDE", "LONGITUDE"]].to_numpy(dtype=np.float64))
+    # ...and has categories[i], for attribute filters over the radius candidates
+    categories_file = f"business_v{version}_categories.npy"
+    np.save(os.path.join(index_dir, categories_file), df["CATEGORIES"].fillna("").to_numpy(dtype=str))
+
+    manifest = {
+        "version": version,
+        "index_file": index_file,
+        "ids_file": ids_file,
+        "coords_file": coords_file,
+        "categories_file": categories_file,
+        "kind": kind,
+        "dim": int(embeddings.shape[1]),
+        "count": int(index.ntotal),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    write_manifest(manifest, index_dir)
+    return manifest
+
+
+@st.cache_resource(show_spinner=False)
+def load_index(index_dir=INDEX_DIR):
+    """Open the current index version with mmap. Cached, so this happens once per process."""
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No FAISS index found in {index_dir}. Run `python -m utils.index` first.")
+
+    index = faiss.read_index(os.path.join(index_dir, manifest["index_file"]), faiss.IO_FLAG_MMAP)
+    business_ids = pd.Index(np.load(os.path.join(index_dir, manifest["ids_file"])))
+    return index, business_ids
+
+
+@st.cache_resource(show_spinner=False)
+def load_geo_index(index_dir=INDEX_DIR):
+    """Spatial index over the index rows' LATITUDE/LONGITUDE, built once per process."""
+    # Imported here: the offline build (`python -m utils.index`) has no <repo>/common on sys.path yet
+    from common.geo import build_geo_index
+
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No FAISS index found in {index_dir}. Run `python -m utils.index` first.")
+
+    coords = np.load(os.path.join(index_dir, manifest["coords_file"]))
+    return build_geo_index(coords[:, 0], coords[:, 1]), coords
+
+
+@st.cache_resource(show_spinner=False)
+def load_row_categories(index_dir=INDEX_DIR):
+    """CATEGORIES string of every index row, memory-mapped; None for indexes built without them."""
+    manifest = read_manifest(index_dir)
+    if manifest is None or "categories_file" not in manifest:
+        return None
+    return np.load(os.path.join(index_dir, manifest["categories_file"]), mmap_mode="r")
+
+
+# Kinds whose search() rejects any SearchParameters (so no ID selector either)
+NO_SEARCH_PARAMS = (faiss.IndexPQ,)
+
+
+def search_params(index, ef_search=None, nprobe=None, sel=None):
+    """SearchParameters for this index's kind: efSearch (HNSW) or nprobe (IVF), plus an optional ID selector.
+
+    None for the NO_SEARCH_PARAMS kinds.
+    """
+    if isinstance(index, NO_SEARCH_PARAMS):
+        return None
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=ef_search or DEFAULT_EF_SEARCH, sel=sel)
+    if isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(nprobe=nprobe or DEFAULT_NPROBE, sel=sel)
+    return faiss.SearchParameters(sel=sel)
+
+
+def search_index(index, query_emb, row_ids, top_k, ef_search=None, nprobe=None):
+    """Best matches of a normalized query among the given index rows.
+
+    row_ids go to FAISS as an IDSelectorBatch, so the one global index is searched
+    with only those rows eligible; nothing is rebuilt or copied per query. Kinds that
+    take no selector (NO_SEARCH_PARAMS) score the decoded candidate vectors instead.
+    Returns (positions into row_ids, scores), best match first.
+    """
+    row_ids = np.asarray(row_ids, dtype="int64")
+    if len(row_ids) == 0 or index.ntotal == 0:
+        return np.array([], dtype="int64"), np.array([], dtype="float32")
+
+    top_k = min(top_k, len(row_ids))
+    if isinstance(index, NO_SEARCH_PARAMS):
+        return _score_rows(index, query_emb, row_ids, top_k)
+
+    sel = faiss.IDSelectorBatch(row_ids)
+    scores, ids = index.search(query_emb, top_k, params=search_params(index, ef_search, nprobe, sel))
+    scores, ids = scores[0], ids[0]
+
+    if (ids < 0).any():
+        # A very selective filter can starve the approximate kinds (too few eligible rows in
+        # the visited clusters / graph neighbourhood), so score the candidates exhaustively
+        if isinstance(index, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF(nprobe=index.nlist, sel=sel)
+            scores, ids = index.search(query_emb, top_k, params=params)
+            scores, ids = scores[0], ids[0]
+        else:
+            return _score_rows(index, query_emb, row_ids, top_k)
+
+    keep = ids >= 0
+    order = np.argsort(row_ids)
+    positions = order[np.searchsorted(row_ids, ids[keep], sorter=order)]
+    return positions, scores[keep]
+
+
+def _score_rows(index, query_emb, row_ids, top_k):
+    """Exhaustive inner product of the query with the given rows' (decoded) vectors."""
+    all_scores = index.reconstruct_batch(row_ids) @ query_emb[0]
+    top = np.argpartition(-all_scores, top_k - 1)[:top_k]
+    top = top[np.argsort(-all_scores[top])]
+    return top, all_scores[top]
+
+
+def exclude_categories(row_ids, row_categories, categories):
+    """Drop index rows tagged with any of the given categories. Costs O(len(row_ids))."""
+    excluded = {c.strip().lower() for c in categories or () if c.strip()}
+    if not excluded or row_categories is None or len(row_ids) == 0:
+        return row_ids
+    keep = np.fromiter(
+        (excluded.isdisjoint(c.strip().lower() for c in str(row_categories[r]).split(",")) for r in row_ids),
+        dtype=bool, count=len(row_ids),
+    )
+    return row_ids[keep]
+
+
+def recall_report(embeddings, kinds=None, k=10, n_queries=1000, seed=0, ef_search=None, nprobe=None):
+    """Recall@k, size and speed of each index kind against exact flat-L2 search.
+
+    Queries are business vectors sampled from the data; since every vector is
+    normalized, flat-L2 ranks exactly like the flat inner-product index the app used to search.
+    """
+    kinds = kinds or list(INDEX_KINDS)
+    rng = np.random.default_rng(seed)
+    queries = embeddings[rng.choice(len(embeddings), min(n_queries, len(embeddings)), replace=False)]
+    k = min(k, len(embeddings))
+
+    exact = faiss.IndexFlatL2(embeddings.shape[1])
+    exact.add(embeddings)
+    _, truth = exact.search(queries, k)
+
+    rows = []
+    for kind in kinds:
+        start = time.perf_counter()
+        index = make_index(embeddings, kind)
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, found = index.search(queries, k, params=search_params(index, ef_search, nprobe))
+        search_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        hits = (found[:, :, None] == truth[:, None, :]).any(axis=2).sum(axis=1)
+        size = len(faiss.serialize_index(index))
+        rows.append({
+            "kind": kind,
+            f"recall@{k}": round(float(hits.mean() / k), 4),
+            "bytes_per_vector": round(size / index.ntotal, 1),
+            "index_mb": round(size / 2**20, 2),
+            "build_s": round(build_s, 2),
+            "search_ms_per_query": round(search_ms, 3),
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    # utils.database and utils.geocode import the shared modules in <repo>/common
+    sys.path.insert(0, ROOT_DIR)
+    from utils.database import load_business_data
+    from utils.geocode import fetch_places, build_gazetteer
+    from utils.snapshot import sync_snapshot
+
+    parser = argparse.ArgumentParser(description="Build the business FAISS index and gazetteer")
+    parser.add_argument("--kind", choices=list(INDEX_KINDS), default=DEFAULT_KIND, help="index storage mode")
+    parser.add_argument("--report", action="store_true", help="print recall@k of every kind vs exact search instead of building")
+    parser.add_argument("-k", type=int, default=10, help="k for the recall report")
+    parser.add_argument("--ef-search", type=int, default=None, help=f"HNSW efSearch for the report (default {DEFAULT_EF_SEARCH})")
+    parser.add_argument("--nprobe", type=int, default=None, help=f"IVF nprobe for the report (default {DEFAULT_NPROBE})")
+    args = parser.parse_args()
+
+    if args.report:
+        report = recall_report(load_business_data()[1], k=args.k, ef_search=args.ef_search, nprobe=args.nprobe)
+        print(report.to_string(index=False))
+        raise SystemExit
+
+    snapshot = sync_snapshot()
+    print(f"✅ {snapshot['mode'].capitalize()} sync of snapshot v{snapshot['version']} ({snapshot['count']} businesses)")
+
+    manifest = build_index(*load_business_data(), kind=args.kind)
+    print(f"✅ Built {args.kind} index v{manifest['version']} with {manifest['count']} businesses in {INDEX_DIR}")
+
+    gazetteer = build_gazetteer(fetch_places())
+    print(f"✅ Built gazetteer with {len(gazetteer['cities'])} cities and {len(gazetteer['zips'])} zip codes")
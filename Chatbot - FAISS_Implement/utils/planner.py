@@ -1,7 +1,8 @@
 # utils/recommendation.py
 import streamlit as st
 from utils.database import load_data_from_snowflake
-from utils.query import run_similarity_search, query_ollama
+from utils.query import run_similarity_search
+from common.ollama import query_ollama
 
 
 @st.cache_data  ### Added
@@ -12,7 +13,7 @@ def display_preference_based_recommendations():
 
     if preferences:
         st.markdown("### 🌟 Based on your previous visits why can't you plan for this? !!")
-        preference_based_results = run_similarity_search(user_location,query_input=preferences, df=df)
+        preference_based_results = run_similarity_search(user_location,query_input=preferences, _df=df)
         top_2 = preference_based_results.head(1)
 
         expected_columns = ["NAME", "CATEGORIES"]
@@ -1,73 +1,74 @@
+import os
 import numpy as np
 import streamlit as st
 import pandas as pd
 import faiss
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-import requests
-import torch
-from geopy.distance import geodesic
+from common import tracing
+from common.embeddings import encode_query
+from common.geo import haversine_km, geodesic_km, radius_query
+from utils.geocode import get_lat_lon
+from utils.index import load_index, load_geo_index, load_row_categories, search_index, exclude_categories
 
+# The model BUSINESS_EMBEDDINGS was built with (see LLM/Embeddings_Snowflake.py)
+MODEL_NAME = "paraphrase-MiniLM-L6-v2"
+# Geodesic instead of haversine for the 5 km cut-off and the reported distances (about 0.5% more accurate, slower)
+EXACT_DISTANCE = os.environ.get("GEO_EXACT_DISTANCE", "0") == "1"
 
-def get_lat_lon(location_query):
-    """Get latitude and longitude from a location query using geopy."""
-    from geopy.geocoders import Nominatim
-    geolocator = Nominatim(user_agent="geopyApp")
-    try:
-        location = geolocator.geocode(location_query)
-        if location:
-            return location.latitude, location.longitude
-    except:
-        return None, None
-    return None, None
 
+@tracing.traced("retrieval", search_cache="hit")
 @st.cache_data ###Added
-def run_similarity_search(user_location, query_input, df, top_k=5):
+def run_similarity_search(user_location, query_input, _df, top_k=5, ef_search=None, nprobe=None, excluded_categories=None):
+    """Top businesses near user_location for query_input.
+
+    _df is the business metadata, loaded once per process like the index; the underscore
+    keeps st.cache_data from hashing the whole frame on every call.
+    ef_search (HNSW) and nprobe (IVF) trade recall for latency on approximate indexes;
+    by default they come from FAISS_EF_SEARCH / FAISS_NPROBE (see utils/index.py).
+    Businesses in any of excluded_categories are left out of the search.
+    """
+    # Only runs when st.cache_data has no answer for these arguments
+    tracing.record(search_cache="miss")
     latitude, longitude = get_lat_lon(user_location)
     if latitude is None:
         return pd.DataFrame()
 
-    # Calculate distances to each business
-    df['DISTANCE'] = df.apply(lambda row: geodesic((latitude, longitude), (row['LATITUDE'], row['LONGITUDE'])).km, axis=1)
-    
-    # Filter businesses within 2 km of the user location
-    df_filtered = df[df['DISTANCE'] <= 5].copy()
-    
-    # Ensure EMBEDDING is in the correct format
-    df_filtered["EMBEDDING"] = df_filtered["EMBEDDING"].apply(lambda x: np.array(x, dtype=np.float32))
-    df_filtered["EMBEDDING"] = df_filtered["EMBEDDING"].apply(lambda x: x / np.linalg.norm(x))
-
-    # Encode the query input into an embedding
-    #device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    # Candidate index rows within 5 km of the user location, read from the spatial index
+    with tracing.span("geo_filter") as span:
+        index, business_ids = load_index()
+        geo_index, coords = load_geo_index()
+        row_ids = radius_query(geo_index, latitude, longitude, radius_km=5, exact=EXACT_DISTANCE)
+        span["in_radius"] = len(row_ids)
+        row_ids = exclude_categories(row_ids, load_row_categories(), excluded_categories)
+        span["candidates"] = len(row_ids)
+        distance_km = geodesic_km if EXACT_DISTANCE else haversine_km
+        distances = distance_km(latitude, longitude, coords[row_ids, 0], coords[row_ids, 1])
 
-# Load the model and move it to the device
-    model = SentenceTransformer("paraphrase-MiniLM-L6-v2") # This moves the model to the device
+    # Encode the query input into an embedding with the shared, already loaded model
+    query_emb = encode_query(query_input, MODEL_NAME)
+    faiss.normalize_L2(query_emb)  # Index vectors are normalized, so inner product = cosine similarity
 
-    query_emb = model.encode([query_input], convert_to_numpy=True).astype("float32")
-    
-    # Set up the FAISS index
-    index = faiss.IndexFlatL2(query_emb.shape[1])  # L2 distance for cosine similarity
-    index.add(np.vstack(df_filtered["EMBEDDING"].values))  # Use filtered embeddings for the index
+    # Search the one global index with only the candidate rows eligible
+    with tracing.span("search") as span:
+        indices, scores = search_index(index, query_emb, row_ids, top_k, ef_search=ef_search, nprobe=nprobe)
+        span["results"] = len(indices)
 
-    k = min(top_k, len(df_filtered))
-    
-    # Perform the search
-    distances, indices = index.search(query_emb, k)
-
-    if len(indices[0]) == 0:
+    if len(indices) == 0:
         return pd.DataFrame()
 
-    results = []
+    with tracing.span("assembly"):
+        # Only the hits need their metadata looked up
+        hit_ids = business_ids[row_ids[indices]]
+        hits = _df[_df['BUSINESS_ID'].isin(hit_ids)].drop_duplicates('BUSINESS_ID').set_index('BUSINESS_ID')
+
+        results = []
 
-    # Loop through the indices of the top-k results from the filtered data
-    for idx in indices[0]:
-        if idx < len(df_filtered):
-            row = df_filtered.iloc[idx]  # Get the corresponding row from the filtered DataFrame
-            cosine_sim = cosine_similarity(query_emb.reshape(1, -1), row['EMBEDDING'].reshape(1, -1))[0][0]  # Calculate cosine similarity
-            
-            # Append the result with the expected fields
+        # Loop through the top-k results from the nearby rows
+        for idx, business_id, cosine_sim in zip(indices, hit_ids, scores):
+            if business_id not in hits.index:
+                continue
+            row = hits.loc[business_id]
             results.append({
-                'BUSINESS_ID': row['BUSINESS_ID'],
+                'BUSINESS_ID': business_id,
                 'NAME': row['NAME'],
                 'CATEGORIES': row['CATEGORIES'],
                 'FLATTENED_ATTRIBUTES': row['FLATTENED_ATTRIBUTES'],
@@ -75,21 +76,15 @@ def run_similarity_search(user_location, query_input, df, top_k=5):
                 'CITY' : row['CITY'],
                 'LATITUDE': row['LATITUDE'],
                 'LONGITUDE': row['LONGITUDE'],
-                'SIMILARITY_SCORE': cosine_sim,
-                'DISTANCE': row['DISTANCE']
+                'SIMILARITY_SCORE': float(cosine_sim),
+                'DISTANCE': float(distances[idx])
             })
 
-    # Return the results sorted by similarity score and then by distance (if needed)
-    result_df = pd.DataFrame(results).sort_values(by=['SIMILARITY_SCORE', 'DISTANCE'], ascending=[False, True]).head(2)
+        if not results:
+            return pd.DataFrame()
+
+        # Return the results sorted by similarity score and then by distance (if needed)
+        result_df = pd.DataFrame(results).sort_values(by=['SIMILARITY_SCORE', 'DISTANCE'], ascending=[False, True]).head(2)
 
     # Return the results DataFrame
     return result_df
-
-
-def query_ollama(prompt, model="mistral"):
-    response = requests.post("http://localhost:11434/api/generate", json={
-        "model": model,
-        "prompt": prompt,
-        "stream": False
-    })
-    return response.json()['response']
\ No newline at end of file
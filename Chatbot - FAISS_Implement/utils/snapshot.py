@@ -0,0 +1,181 @@
+# utils/snapshot.py
+#
+# Local snapshot of BUSINESS_EMBEDDINGS: business metadata as Parquet, embeddings
+# as a raw float32 .npy matrix (row i of one is row i of the other) and a manifest.
+# The app reads the snapshot at startup; only the sync touches the warehouse.
+# Sync (from the "Chatbot - FAISS_Implement" folder):  python -m utils.snapshot [--full]
+
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
+SNAPSHOT_DIR = os.path.join(ROOT_DIR, ".snapshot")
+
+METADATA_COLUMNS = ["BUSINESS_ID", "NAME", "CITY", "STATE", "LATITUDE", "LONGITUDE", "CATEGORIES", "FLATTENED_ATTRIBUTES"]
+EMBEDDING_DIM = 384
+# Round-trips the warehouse clock through the manifest without losing the timezone
+TIMESTAMP_FORMAT = "YYYY-MM-DD HH24:MI:SS.FF9 TZHTZM"
+
+
+def read_manifest(snapshot_dir=SNAPSHOT_DIR):
+    path = os.path.join(snapshot_dir, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_manifest(manifest, snapshot_dir=SNAPSHOT_DIR):
+    # Write-then-rename so a running app never sees a half written manifest
+    path = os.path.join(snapshot_dir, "manifest.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(meta, embeddings, synced_at, mode, snapshot_dir=SNAPSHOT_DIR):
+    """Save meta + embeddings as the next snapshot version, then point the manifest at it."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    previous = read_manifest(snapshot_dir) or {"version": 0}
+    version = previous["version"] + 1
+
+    meta_file = f"businesses_v{version}.parquet"
+    embeddings_file = f"embeddings_v{version}.npy"
+    meta.reset_index(drop=True).to_parquet(os.path.join(snapshot_dir, meta_file), index=False)
+    np.save(os.path.join(snapshot_dir, embeddings_file), np.ascontiguousarray(embeddings, dtype=np.float32))
+
+    manifest = {
+        "version": version,
+        "meta_file": meta_file,
+        "embeddings_file": embeddings_file,
+        "count": int(len(meta)),
+        "dim": int(embeddings.shape[1]),
+        "synced_at": synced_at,
+        "mode": mode,
+        "written_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    write_manifest(manifest, snapshot_dir)
+
+    # The previous version may still be open in a running app; anything older can go
+    for name in os.listdir(snapshot_dir):
+        if name.startswith(("businesses_v", "embeddings_v")):
+            file_version = int(name.split("_v")[1].split(".")[0])
+            if file_version < version - 1:
+                os.remove(os.path.join(snapshot_dir, name))
+    return manifest
+
+
+def read_snapshot(snapshot_dir=SNAPSHOT_DIR, with_embeddings=True):
+    """Return (meta DataFrame, (N, dim) float32 embeddings) from the current snapshot, or None.
+
+    With with_embeddings=False the matrix is not read and None is returned in its place.
+    """
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        return None
+    meta = pd.read_parquet(os.path.join(snapshot_dir, manifest["meta_file"]))
+    if not with_embeddings:
+        return meta, None
+    embeddings = np.load(os.path.join(snapshot_dir, manifest["embeddings_file"]))
+    return meta, embeddings
+
+
+def decode_embeddings(blobs, dim=EMBEDDING_DIM):
+    """(N, dim) float32 matrix from EMBEDDING_F32 values (packed little-endian float32, one per row)."""
+    blobs = list(blobs)
+    missing = sum(blob is None for blob in blobs)
+    if missing:
+        raise ValueError(
+            f"EMBEDDING_F32 is empty for {missing} businesses; rerun LLM/Embeddings_Snowflake.py to backfill it"
+        )
+    # bytearray keeps the result writable (faiss.normalize_L2 works in place)
+    return np.frombuffer(bytearray().join(blobs), dtype="<f4").reshape(-1, dim).astype(np.float32, copy=False)
+
+
+def _fetch_rows(cursor, where=""):
+    columns = ", ".join(METADATA_COLUMNS)
+    cursor.execute(f"""
+        SELECT {columns}, EMBEDDING_F32
+        FROM BUSINESS_EMBEDDINGS
+        {where}
+    """)
+    df = cursor.fetch_pandas_all()
+    return df[METADATA_COLUMNS], decode_embeddings(df["EMBEDDING_F32"])
+
+
+def sync_snapshot(full=False, snapshot_dir=SNAPSHOT_DIR):
+    """Bring the snapshot up to date with BUSINESS_EMBEDDINGS.
+
+    Incremental syncs read only the businesses that changed since the last sync, using
+    the table's change tracking (see sql_scripts/table_creation.sql). A full reload is
+    used when there is no snapshot yet, when full=True, or when the CHANGES query fails
+    (change tracking off, or the last sync is older than the table's retention).
+    """
+    from utils.database import get_snowflake_connection
+
+    manifest = read_manifest(snapshot_dir)
+    snapshot = None if full or manifest is None else read_snapshot(snapshot_dir)
+
+    conn = get_snowflake_connection()
+    cursor = conn.cursor()
+    try:
+        # Taken before reading anything, so changes made during the sync are picked up next time
+        cursor.execute(f"SELECT TO_VARCHAR(CURRENT_TIMESTAMP(), '{TIMESTAMP_FORMAT}')")
+        synced_at = cursor.fetchone()[0]
+
+        if snapshot is not None:
+            changes = f"""
+                BUSINESS_EMBEDDINGS
+                CHANGES(INFORMATION => DEFAULT)
+                AT(TIMESTAMP => TO_TIMESTAMP_LTZ('{manifest["synced_at"]}', '{TIMESTAMP_FORMAT}'))
+            """
+            try:
+                cursor.execute(f"SELECT DISTINCT BUSINESS_ID FROM {changes}")
+                changed_ids = {row[0] for row in cursor.fetchall()}
+            except Exception as e:
+                print(f"⚠️ Incremental sync unavailable ({e}), falling back to a full reload")
+                snapshot = None
+
+        if snapshot is None:
+            meta, embeddings = _fetch_rows(cursor)
+            return write_snapshot(meta, embeddings, synced_at, "full", snapshot_dir)
+
+        meta, embeddings = snapshot
+        if not changed_ids:
+            # Nothing to rewrite, just move the sync point forward
+            manifest.update(synced_at=synced_at, mode="incremental")
+            write_manifest(manifest, snapshot_dir)
+            manifest["changed"] = 0
+            return manifest
+
+        # Drop every local row of a changed business, then re-read its current rows (covers
+        # inserts, updates and deletes alike)
+        new_meta, new_embeddings = _fetch_rows(
+            cursor, f"WHERE BUSINESS_ID IN (SELECT DISTINCT BUSINESS_ID FROM {changes})"
+        )
+        keep = ~meta["BUSINESS_ID"].isin(changed_ids).to_numpy()
+        meta = pd.concat([meta[keep], new_meta], ignore_index=True)
+        embeddings = np.concatenate([embeddings[keep], new_embeddings])
+        manifest = write_snapshot(meta, embeddings, synced_at, "incremental", snapshot_dir)
+        manifest["changed"] = len(changed_ids)
+        return manifest
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    # utils.database imports the shared modules in <repo>/common
+    sys.path.insert(0, ROOT_DIR)
+    start = time.perf_counter()
+    manifest = sync_snapshot(full="--full" in sys.argv[1:])
+    print(
+        f"✅ {manifest['mode'].capitalize()} sync wrote snapshot v{manifest['version']} "
+        f"({manifest['count']} businesses, {manifest.get('changed', manifest['count'])} fetched) "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
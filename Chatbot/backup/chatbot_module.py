@@ -1,16 +1,8 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from Chatbot.backup.utils import run_similarity_search
 
-# Load embedding model once
-@st.cache_resource(show_spinner=False)
-def load_embedding_model():
-    return SentenceTransformer('paraphrase-MiniLM-L6-v2')
-
-embedding_model = load_embedding_model()
-
 
 def process_chat_input(user_input, location_input):
     if "last_results" not in st.session_state:
@@ -18,13 +10,7 @@ def process_chat_input(user_input, location_input):
 
     df = st.session_state.get("last_results")
 
-    # Generate embeddings for the filtered businesses if not already done
-    if 'EMBEDDING' not in df.columns:
-        with st.spinner("🔍 Embedding business attributes for comparison..."):
-            df['EMBEDDING'] = df['FLATTENED_ATTRIBUTES'].fillna("").apply(
-                lambda text: embedding_model.encode(text, convert_to_numpy=True)
-            )
-            st.session_state["last_results"] = df  # Cache embeddings
+    # No per-row embedding step: the rows' labels point into the shared embedding matrix
 
     # Run similarity search using user input and location
     response = run_similarity_search(location_input, user_input, df)
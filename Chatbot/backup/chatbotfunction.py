@@ -1,23 +1,15 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from Chatbot.backup.utils import load_data_from_snowflake, get_lat_lon, run_similarity_search 
+from Chatbot.backup.utils import load_data_from_snowflake, get_lat_lon, run_similarity_search
 
 
 def process_chat_input(user_input, location_input):
-    # Initialize the embedding model
-    embedding_model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
-
     # Check if "last_results" is available (for follow-up conversation)
     if "last_results" in st.session_state:
         df = st.session_state.get("last_results")
 
-        # Make sure embeddings are generated if not already done
-        if 'EMBEDDING' not in df.columns:
-            df['EMBEDDING'] = df['FLATTENED_ATTRIBUTES'].fillna("").apply(
-                lambda text: embedding_model.encode(text, convert_to_numpy=True)
-            )
+        # Earlier results keep their row labels, which point into the shared embedding matrix
 
         # Run similarity search based on location and user input
         response = run_similarity_search(location_input, user_input, df)
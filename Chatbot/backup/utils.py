@@ -4,16 +4,18 @@ import numpy as np
 from sentence_transformers import SentenceTransformer
 from geopy.geocoders import Nominatim
 from geopy.distance import geodesic
-from sklearn.metrics.pairwise import cosine_similarity
 from scipy.spatial.distance import euclidean
 import faiss
 import snowflake.connector
 import os
 import json
 import re
-import requests
+from common.ollama import query_ollama
 
-embedding_model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
+# Load embedding model once per process
+@st.cache_resource(show_spinner=False)
+def load_embedding_model():
+    return SentenceTransformer('paraphrase-MiniLM-L6-v2')
 
 def get_snowflake_connection():
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -31,19 +33,34 @@ def get_snowflake_connection():
     )
     return conn
 
-def load_data_from_snowflake():
+@st.cache_resource(show_spinner=False)
+def load_business_data():
+    """Business metadata plus one L2-normalized, C-contiguous (N, 384) float32 embedding matrix.
+
+    Row i of the matrix belongs to the metadata row labelled i.
+    """
     conn = get_snowflake_connection()
     cursor = conn.cursor()
     query = """
     SELECT BUSINESS_ID, NAME, LATITUDE, LONGITUDE, STATE,
-           CATEGORIES, FLATTENED_ATTRIBUTES,
-           PARSE_JSON(embedding)::VECTOR(FLOAT, 384) AS EMBEDDING
+           CATEGORIES, FLATTENED_ATTRIBUTES, EMBEDDING_F32
     FROM BUSINESS_EMBEDDINGS
     """
     cursor.execute(query)
     df = cursor.fetch_pandas_all()
     conn.close()
-    return df
+
+    # EMBEDDING_F32 is packed little-endian float32: one copy into a writable buffer, no parsing.
+    # Normalize once here instead of on every search
+    embeddings = np.frombuffer(bytearray().join(df["EMBEDDING_F32"]), dtype="<f4").reshape(-1, 384)
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    faiss.normalize_L2(embeddings)
+    meta = df.drop(columns=["EMBEDDING_F32"]).reset_index(drop=True)
+    return meta, embeddings
+
+def load_data_from_snowflake():
+    # Shallow copy, so callers can add columns without touching the cached frame
+    return load_business_data()[0].copy(deep=False)
 
 def get_lat_lon(location_query):
     geolocator = Nominatim(user_agent="geopyApp")
@@ -60,44 +77,43 @@ def run_similarity_search(query_input, df, top_k=10):
     if not query_input or df.empty:
         return pd.DataFrame()
 
-    df = df.copy()
-
-    # Normalize business embeddings
-    df['EMBEDDING'] = df['EMBEDDING'].apply(lambda x: np.array(x, dtype=np.float32))
-    df['EMBEDDING'] = df['EMBEDDING'].apply(lambda x: x / np.linalg.norm(x))
+    # df is (a subset of) the load_data_from_snowflake() frame, and its row labels index the
+    # shared matrix; the results below keep those labels so follow-up searches work the same way
+    _, embeddings = load_business_data()
+    if df.index.equals(pd.RangeIndex(len(embeddings))):
+        vectors = embeddings
+    else:
+        vectors = embeddings[df.index.to_numpy()]
 
     # Encode user query
-    embedding_model = SentenceTransformer("paraphrase-MiniLM-L6-v2")
+    embedding_model = load_embedding_model()
     query_embedding = embedding_model.encode([query_input], convert_to_numpy=True).astype("float32")
-    query_embedding = query_embedding / np.linalg.norm(query_embedding)
+    faiss.normalize_L2(query_embedding)
 
-    # Build FAISS index for inner product similarity (cosine proxy)
-    index = faiss.IndexFlatIP(query_embedding.shape[1])
-    all_embeddings = np.vstack(df["EMBEDDING"].values)
-    index.add(all_embeddings)
+    # Inner product of normalized vectors = cosine similarity
+    scores = vectors @ query_embedding[0]
 
     # Retrieve top_k most similar entries
     k = min(top_k, len(df))
-    distances, indices = index.search(query_embedding, k)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
 
     results = []
-    for idx in indices[0]:
-        if idx < len(df):
-            row = df.iloc[idx]
-            cosine_sim = cosine_similarity(query_embedding, row["EMBEDDING"].reshape(1, -1))[0][0]
-            results.append({
-                "BUSINESS_ID": row["BUSINESS_ID"],
-                "NAME": row["NAME"],
-                "CATEGORIES": row["CATEGORIES"],
-                "FLATTENED_ATTRIBUTES": row["FLATTENED_ATTRIBUTES"],
-                "STATE": row["STATE"],
-                "CITY": row.get("CITY", ""),
-                "LATITUDE": row["LATITUDE"],
-                "LONGITUDE": row["LONGITUDE"],
-                "SIMILARITY_SCORE": cosine_sim
-            })
-
-    return pd.DataFrame(results).sort_values(by="SIMILARITY_SCORE", ascending=False)
+    for idx in top:
+        row = df.iloc[idx]
+        results.append({
+            "BUSINESS_ID": row["BUSINESS_ID"],
+            "NAME": row["NAME"],
+            "CATEGORIES": row["CATEGORIES"],
+            "FLATTENED_ATTRIBUTES": row["FLATTENED_ATTRIBUTES"],
+            "STATE": row["STATE"],
+            "CITY": row.get("CITY", ""),
+            "LATITUDE": row["LATITUDE"],
+            "LONGITUDE": row["LONGITUDE"],
+            "SIMILARITY_SCORE": float(scores[idx])
+        })
+
+    return pd.DataFrame(results, index=df.index[top]).sort_values(by="SIMILARITY_SCORE", ascending=False)
 
 
 
@@ -148,11 +164,3 @@ def extract_intent_from_message(user_message):
         "category": found_category,
         "is_complete": bool(found_city and found_category)
     }
-
-def query_ollama(prompt, model="mistral"):
-    response = requests.post("http://localhost:11434/api/generate", json={
-        "model": model,
-        "prompt": prompt,
-        "stream": False
-    })
-    return response.json()['response']
@@ -1,4 +1,15 @@
+import os
+import sys
+
+# Modules shared by both apps live in <repo>/common
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from common import tracing
 from screen import screen_ui
 
 if __name__ == "__main__":
+    # Re-runs of this script find the endpoint already up
+    tracing.start_metrics_server()
     screen_ui()
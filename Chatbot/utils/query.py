@@ -2,90 +2,299 @@
 
 import streamlit as st
 import chromadb
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
-import requests
 import os
+import re
 from geopy.distance import geodesic
 from geopy.geocoders import Nominatim
 import random
+import numpy as np
+from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+from common.embeddings import load_embedding_model, encode_query
+from common.geo import build_geo_index, radius_query, haversine_km
+from common import tracing
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
-CHROMA_DIR = os.path.join(ROOT_DIR, ".chroma")
+CHROMA_DIR = os.environ.get("CHROMA_DIR", os.path.join(ROOT_DIR, ".chroma"))
+NEARBY_RADIUS_KM = 5.0
+CITY_RADIUS_KM = 15.0
+MAX_LOCAL_FETCH = 400
+# The model the collection was ingested with (see data-ingestion/ingest_business_kb.py)
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# States we have businesses for
+STATE_NAMES = {
+    "pennsylvania": "PA",
+    "florida": "FL",
+    "tennessee": "TN",
+    "indiana": "IN",
+    "missouri": "MO",
+}
+
+@st.cache_resource(show_spinner=False)
+def load_embedding_fn(model_name=MODEL_NAME):
+    """The collection's embedding function, on the same model instance encode_query uses."""
+    # The embedding function reuses a model already in its class-level cache instead of loading another
+    SentenceTransformerEmbeddingFunction.models.setdefault(model_name, load_embedding_model(model_name))
+    return SentenceTransformerEmbeddingFunction(model_name=model_name)
 
 @st.cache_resource(show_spinner=False)
 def load_chroma_collection():
     chroma_client = chromadb.PersistentClient(path=CHROMA_DIR)
-    embedding_fn = SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
     collection = chroma_client.get_or_create_collection(
         name="street_fairy_business_kb",
-        embedding_function=embedding_fn
+        embedding_function=load_embedding_fn()
     )
     return collection
 
-def run_similarity_search(query_input, top_k=5, around_location=None):
-    try:
-        collection = load_chroma_collection()
+@st.cache_resource(show_spinner=False)
+def load_business_locations(page_size=10000):
+    """Id, coordinates, city and state of every business, read once per process from the metadata stored at ingestion."""
+    collection = load_chroma_collection()
+    ids, lats, lons, cities, states = [], [], [], [], []
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        for biz_id, meta in zip(page["ids"], page["metadatas"]):
+            lat, lon = meta.get("latitude"), meta.get("longitude")
+            if isinstance(lat, (int, float)) and isinstance(lon, (int, float)):
+                ids.append(biz_id)
+                lats.append(lat)
+                lons.append(lon)
+                cities.append(meta.get("city") or "")
+                states.append(meta.get("state") or "")
+        offset += len(page["ids"])
+
+    return {
+        "ids": np.array(ids),
+        "lats": np.array(lats, dtype=np.float64),
+        "lons": np.array(lons, dtype=np.float64),
+        "cities": cities,
+        "states": states,
+    }
+
+@st.cache_resource(show_spinner=False)
+def load_geo_index():
+    """Spatial index over the businesses' latitude/longitude, built once per process."""
+    locations = load_business_locations()
+    if len(locations["ids"]) == 0:
+        return None, np.array([])
+    return build_geo_index(locations["lats"], locations["lons"]), locations["ids"]
 
+@st.cache_resource(show_spinner=False)
+def load_places():
+    """Known cities (lowercased name -> (business count, city, state, lat, lon), biggest first) and states."""
+    locations = load_business_locations()
+    cities = {}
+    groups = {}
+    for city, state, lat, lon in zip(locations["cities"], locations["states"], locations["lats"], locations["lons"]):
+        if city and state:
+            groups.setdefault((city, state), []).append((lat, lon))
+    for (city, state), coords in groups.items():
+        lat, lon = np.mean(coords, axis=0)
+        cities.setdefault(_place_key(city), []).append((len(coords), city, state, float(lat), float(lon)))
+    for candidates in cities.values():
+        candidates.sort(reverse=True)
+    return {"cities": cities, "states": {s for s in locations["states"] if s}}
+
+def _place_key(text):
+    # "St. Louis" and "st louis" -> "st louis"
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+def resolve_place(message):
+    """City (with its centroid) and/or state mentioned in a chat message, e.g. "cafes in Tampa" or "bars in PA"."""
+    places = load_places()
+    text = _place_key(message)
+    words = text.split()
+
+    # State by full name, or by an upper-case abbreviation ("in" alone is not Indiana)
+    state = None
+    for name, abbrev in STATE_NAMES.items():
+        if re.search(rf"\b{name}\b", text) and abbrev in places["states"]:
+            state = abbrev
+    for token in re.findall(r"\b[A-Z]{2}\b", message):
+        if token in places["states"]:
+            state = token
+
+    # Longest city name (up to 3 words) that appears in the message
+    for size in (3, 2, 1):
+        for i in range(len(words) - size + 1):
+            candidates = places["cities"].get(" ".join(words[i:i + size]))
+            if candidates:
+                if state:
+                    candidates = [c for c in candidates if c[2] == state] or candidates
+                _, city, city_state, lat, lon = candidates[0]
+                return {"city": city, "state": city_state, "lat": lat, "lon": lon}
+
+    if state:
+        return {"city": None, "state": state, "lat": None, "lon": None}
+    return None
+
+def bounding_box(lat, lon, radius_km):
+    """Chroma where clause selecting the latitude/longitude box that contains the radius_km circle."""
+    dlat = radius_km / 111.32
+    dlon = radius_km / (111.32 * max(np.cos(np.radians(lat)), 0.01))
+    return [
+        {"latitude": {"$gte": lat - dlat}},
+        {"latitude": {"$lte": lat + dlat}},
+        {"longitude": {"$gte": lon - dlon}},
+        {"longitude": {"$lte": lon + dlon}},
+    ]
+
+@tracing.traced("search", scope="local")
+def query_local(collection, query_input, top_k, place, radius_km=CITY_RADIUS_KM):
+    """Semantic search restricted by a Chroma where clause built from a resolved place.
+
+    A city becomes its state plus a bounding box around the city centre; the box corners are
+    trimmed to the radius, over-fetching (doubling n_results) until top_k local results remain.
+    A state alone is a plain equality filter. Returns results shaped like query(), or None.
+    """
+    query_emb = encode_query(query_input, MODEL_NAME).tolist()
+    if place["city"] is None:
         results = collection.query(
-            query_texts=[query_input],
+            query_embeddings=query_emb,
             n_results=top_k,
+            where={"state": {"$eq": place["state"]}},
+            include=["documents", "metadatas", "distances"]
+        )
+        tracing.record(results=len(results["ids"][0]))
+        return results if results["ids"][0] else None
+
+    where = {"$and": [{"state": {"$eq": place["state"]}}] + bounding_box(place["lat"], place["lon"], radius_km)}
+    fetch = top_k * 2
+    while True:
+        results = collection.query(
+            query_embeddings=query_emb,
+            n_results=fetch,
+            where=where,
             include=["documents", "metadatas", "distances"]
         )
+        metas = results["metadatas"][0]
+        distances_km = haversine_km(
+            place["lat"], place["lon"], [m["latitude"] for m in metas], [m["longitude"] for m in metas]
+        )
+        keep = [i for i in range(len(metas)) if distances_km[i] <= radius_km][:top_k]
+        if len(keep) >= top_k or len(metas) < fetch or fetch >= MAX_LOCAL_FETCH:
+            break
+        fetch *= 2
+
+    tracing.record(candidates=len(metas), results=len(keep))
+    if not keep:
+        return None
+    return {
+        "documents": [[results["documents"][0][i] for i in keep]],
+        "metadatas": [[metas[i] for i in keep]],
+        "distances": [[results["distances"][0][i] for i in keep]],
+    }
+
+@tracing.traced("search", scope="nearby")
+def query_nearby(collection, query_input, top_k, around_location, radius_km=NEARBY_RADIUS_KM):
+    """Rank only the businesses within radius_km of around_location.
+
+    Returns results shaped like collection.query(), or None when nothing is nearby.
+    """
+    tree, ids = load_geo_index()
+    if tree is None:
+        return None
 
-        docs = []
-        geolocator = Nominatim(user_agent="street_fairy_locator")
-
-        for doc, meta, score in zip(results["documents"][0], results["metadatas"][0], results["distances"][0]):
-            lat = meta.get("latitude", None)
-            lon = meta.get("longitude", None)
-            city = meta.get("city", None)
-            state = meta.get("state", None)
-
-            distance_km = None
-
-            # Try calculating real distance
-            if around_location and lat and lon:
-                try:
-                    user_lat, user_lon = around_location
-                    distance_km = round(geodesic((user_lat, user_lon), (lat, lon)).km, 2)
-                except:
-                    distance_km = None
-
-            # 🌟 If no real distance, randomly assign between 0.5 km and 5.0 km
-            if distance_km is None:
-                distance_km = round(random.uniform(0.5, 5.0), 2)
-
-            # ⭐ Handle missing star ratings
-            stars = meta.get("stars", None)
-            if stars is None or stars == "":
-                stars = round(random.uniform(3.5, 5.0), 1)
-            else:
-                stars = round(float(stars), 1)
-
-            docs.append({
-                "DOCUMENT": doc,
-                "CATEGORIES": meta.get("categories", ""),
-                "NAME": meta.get("name", ""),
-                "STATE": state,
-                "CITY": city,
-                "LATITUDE": lat,
-                "LONGITUDE": lon,
-                "STARS": stars,
-                "DISTANCE_KM": distance_km,
-                "SIMILARITY_SCORE": round(score, 4)
-            })
+    user_lat, user_lon = around_location
+    rows = radius_query(tree, user_lat, user_lon, radius_km)
+    tracing.record(candidates=len(rows))
+    if len(rows) == 0:
+        return None
+
+    nearby = collection.get(ids=ids[rows].tolist(), include=["embeddings", "documents", "metadatas"])
+    query_emb = encode_query(query_input, MODEL_NAME)[0]
+    embeddings = np.asarray(nearby["embeddings"], dtype=np.float32)
+
+    # Same squared L2 distance Chroma reports from collection.query()
+    distances = ((embeddings - query_emb) ** 2).sum(axis=1)
+    top = np.argsort(distances)[:top_k]
+    tracing.record(results=len(top))
+
+    return {
+        "documents": [[nearby["documents"][i] for i in top]],
+        "metadatas": [[nearby["metadatas"][i] for i in top]],
+        "distances": [[float(distances[i]) for i in top]],
+    }
+
+@tracing.traced("retrieval")
+def run_similarity_search(query_input, top_k=5, around_location=None):
+    try:
+        collection = load_chroma_collection()
+
+        results = None
+        place = None
+        if around_location:
+            results = query_nearby(collection, query_input, top_k, around_location)
+        else:
+            # A city or state named in the message becomes a where filter on the query itself
+            with tracing.span("geocode", geocoder="places") as span:
+                place = resolve_place(query_input)
+                span["found"] = place is not None
+            if place is not None:
+                results = query_local(collection, query_input, top_k, place)
+
+        # Nothing nearby (or no location at all) -> plain semantic search over everything
+        if results is None:
+            place = None
+            with tracing.span("search", scope="all") as span:
+                results = collection.query(
+                    query_embeddings=encode_query(query_input, MODEL_NAME).tolist(),
+                    n_results=top_k,
+                    include=["documents", "metadatas", "distances"]
+                )
+                span["results"] = len(results["ids"][0])
+
+        with tracing.span("assembly"):
+            docs = []
+            geolocator = Nominatim(user_agent="street_fairy_locator")
+
+            for doc, meta, score in zip(results["documents"][0], results["metadatas"][0], results["distances"][0]):
+                lat = meta.get("latitude", None)
+                lon = meta.get("longitude", None)
+                city = meta.get("city", None)
+                state = meta.get("state", None)
+
+                distance_km = None
+
+                # Try calculating real distance (from the city centre when the message named a city)
+                origin = around_location or (place and place["lat"] is not None and (place["lat"], place["lon"]))
+                if origin and lat and lon:
+                    try:
+                        user_lat, user_lon = origin
+                        distance_km = round(geodesic((user_lat, user_lon), (lat, lon)).km, 2)
+                    except:
+                        distance_km = None
+
+                # 🌟 If no real distance, randomly assign between 0.5 km and 5.0 km
+                if distance_km is None:
+                    distance_km = round(random.uniform(0.5, 5.0), 2)
+
+                # ⭐ Handle missing star ratings
+                stars = meta.get("stars", None)
+                if stars is None or stars == "":
+                    stars = round(random.uniform(3.5, 5.0), 1)
+                else:
+                    stars = round(float(stars), 1)
+
+                docs.append({
+                    "DOCUMENT": doc,
+                    "CATEGORIES": meta.get("categories", ""),
+                    "NAME": meta.get("name", ""),
+                    "STATE": state,
+                    "CITY": city,
+                    "LATITUDE": lat,
+                    "LONGITUDE": lon,
+                    "STARS": stars,
+                    "DISTANCE_KM": distance_km,
+                    "SIMILARITY_SCORE": round(score, 4)
+                })
 
         return docs
 
     except Exception as e:
         st.error(f"Failed to search Chroma: {e}")
         return []
-
-def query_ollama(prompt, model="mistral"):
-    response = requests.post("http://localhost:11434/api/generate", json={
-        "model": model,
-        "prompt": prompt,
-        "stream": False
-    })
-    return response.json()["response"]
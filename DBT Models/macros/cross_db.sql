@@ -0,0 +1,52 @@
+-- Snowflake syntax used by the models, with DuckDB equivalents for the local target
+
+{% macro parse_json(expr) %}
+    {{ return(adapter.dispatch('parse_json')(expr)) }}
+{% endmacro %}
+
+{% macro default__parse_json(expr) %}PARSE_JSON({{ expr }}){% endmacro %}
+
+{% macro duckdb__parse_json(expr) %}
+    {#- Nested attribute values are Python dict reprs; DuckDB's JSON parser needs lowercase booleans -#}
+    CAST(REPLACE(REPLACE({{ expr }}, ': True', ': true'), ': False', ': false') AS JSON)
+{%- endmacro %}
+
+
+{# FROM-clause item with one (key, value) row per field of a JSON object #}
+{% macro flatten_object(expr, alias) %}
+    {{ return(adapter.dispatch('flatten_object')(expr, alias)) }}
+{% endmacro %}
+
+{% macro default__flatten_object(expr, alias) %}LATERAL FLATTEN(input => {{ expr }}) {{ alias }}{% endmacro %}
+
+{% macro duckdb__flatten_object(expr, alias) %}JSON_EACH({{ expr }}) AS {{ alias }}{% endmacro %}
+
+
+{# The value column of flatten_object; scalars come out as plain text on DuckDB, like a VARIANT cast to string #}
+{% macro flattened_value(alias) %}
+    {{ return(adapter.dispatch('flattened_value')(alias)) }}
+{% endmacro %}
+
+{% macro default__flattened_value(alias) %}{{ alias }}.value{% endmacro %}
+
+{% macro duckdb__flattened_value(alias) %}({{ alias }}.value ->> '$'){% endmacro %}
+
+
+{# FROM-clause item with one row (column value) per piece of a delimited string #}
+{% macro split_to_rows(expr, delimiter, alias) %}
+    {{ return(adapter.dispatch('split_to_rows')(expr, delimiter, alias)) }}
+{% endmacro %}
+
+{% macro default__split_to_rows(expr, delimiter, alias) %}LATERAL FLATTEN(input => SPLIT({{ expr }}, '{{ delimiter }}')) {{ alias }}{% endmacro %}
+
+{% macro duckdb__split_to_rows(expr, delimiter, alias) %}UNNEST(STRING_SPLIT({{ expr }}, '{{ delimiter }}')) AS {{ alias }}(value){% endmacro %}
+
+
+{# A top-level field of a JSON column as text #}
+{% macro json_text(column, key) %}
+    {{ return(adapter.dispatch('json_text')(column, key)) }}
+{% endmacro %}
+
+{% macro default__json_text(column, key) %}{{ column }}:{{ key }}::STRING{% endmacro %}
+
+{% macro duckdb__json_text(column, key) %}({{ column }} ->> '{{ key }}'){% endmacro %}
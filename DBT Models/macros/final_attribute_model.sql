@@ -0,0 +1,9 @@
+-- Final_Attribute_Model in Snowflake; the sample seed on the local DuckDB target
+
+{% macro final_attribute_model() %}
+    {%- if target.type == 'duckdb' -%}
+        {{ ref('final_attribute_model_sample') }}
+    {%- else -%}
+        {{ ref('Final_Attribute_Model') }}
+    {%- endif -%}
+{% endmacro %}
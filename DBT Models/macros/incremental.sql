@@ -0,0 +1,47 @@
+-- Incremental runs: Business.updated_at (stamped by data-ingestion/S3_Snowflake_DataLoad_Github.py)
+-- marks changed businesses, every model carries it along, and each run only reprocesses
+-- rows newer than the newest one already in the model. Rows loaded some other way, with
+-- updated_at NULL, count as changed on every run rather than being skipped.
+
+{# The raw Business table; a sample seed on the local DuckDB target #}
+{% macro business_source() %}
+    {%- if target.type == 'duckdb' -%}
+        {{ ref('business_sample') }}
+    {%- else -%}
+        Business
+    {%- endif -%}
+{% endmacro %}
+
+
+{# AND-condition keeping only rows changed since the last run, or never stamped (nothing on full refreshes) #}
+{% macro changed_since_last_run(column='updated_at') %}
+    {%- if is_incremental() -%}
+        AND ({{ column }} > (SELECT COALESCE(MAX(updated_at), CAST('1900-01-01' AS TIMESTAMP)) FROM {{ this }})
+             OR {{ column }} IS NULL)
+    {%- endif -%}
+{% endmacro %}
+
+
+{#
+    Post-hook removing rows an incremental run cannot replace: businesses that no longer
+    match `where`, and rows older than their business (e.g. an attribute that was dropped).
+    A business whose updated_at is NULL was reprocessed by this run, so its stamped rows are older.
+#}
+{% macro delete_stale_business_rows(where) %}
+    {#- resolved outside the guard so the parser records the dependency -#}
+    {%- set business = business_source() -%}
+    {%- if is_incremental() -%}
+    DELETE FROM {{ this }}
+    WHERE business_id NOT IN (
+            SELECT business_id FROM {{ business }}
+            WHERE business_id IS NOT NULL AND {{ where }}
+        )
+       OR business_id IN (
+            SELECT t.business_id
+            FROM {{ this }} t
+            JOIN {{ business }} b ON t.business_id = b.business_id
+            WHERE t.updated_at < b.updated_at
+               OR (b.updated_at IS NULL AND t.updated_at IS NOT NULL)
+        )
+    {%- endif -%}
+{% endmacro %}
@@ -0,0 +1,13 @@
+-- JSON text of the {key: value} object of each group, per warehouse
+
+{% macro json_object_agg(key, value) %}
+    {{ return(adapter.dispatch('json_object_agg')(key, value)) }}
+{% endmacro %}
+
+{% macro default__json_object_agg(key, value) %}
+    TO_JSON(OBJECT_AGG({{ key }}, TO_VARIANT({{ value }})))
+{% endmacro %}
+
+{% macro duckdb__json_object_agg(key, value) %}
+    CAST(JSON_GROUP_OBJECT({{ key }}, {{ value }}) AS VARCHAR)
+{% endmacro %}
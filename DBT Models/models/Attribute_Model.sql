@@ -0,0 +1,27 @@
+{{ config(
+    materialized='incremental',
+    unique_key='business_id',
+    incremental_strategy='delete+insert',
+    post_hook="{{ delete_stale_business_rows(\"is_open = '1' AND STATE IN ('PA','FL','TN','IN','MO')\") }}"
+) }}
+WITH parsed_data AS (
+    SELECT 
+        business_id, 
+        {{ parse_json('Attributes') }} AS attributes_json,
+        updated_at
+    FROM {{ business_source() }}
+    where is_open='1'
+    and STATE IN ('PA','FL','TN','IN','MO')
+    {{ changed_since_last_run() }}
+),
+Attribute_Model AS (
+    SELECT 
+        business_id,
+        f.key AS attribute_name,         
+        {{ flattened_value('f') }} AS attribute_value,
+        updated_at
+    FROM parsed_data,
+    {{ flatten_object('attributes_json', 'f') }}
+    
+)
+select * from Attribute_Model
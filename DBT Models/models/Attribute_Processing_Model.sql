@@ -0,0 +1,40 @@
+{{ config(
+    materialized='incremental',
+    unique_key='business_id',
+    incremental_strategy='delete+insert',
+    post_hook="{{ delete_stale_business_rows(\"is_open = '1' AND STATE IN ('PA','FL','TN','IN','MO')\") }}"
+) }}
+
+{% set json_text_value %}
+            REPLACE(
+                REPLACE(
+                    REPLACE(attribute_value, '''', '"'), 
+                    'None', 'null'                        
+                ), 
+                'u"', '"')
+{% endset %}
+
+WITH Attribute AS (
+    SELECT 
+        business_id, 
+        attribute_name,
+        {{ parse_json(json_text_value) }} AS attributes_json,
+        updated_at
+    FROM {{ ref('Attribute_Model') }}  -- Reference the model correctly
+    WHERE attribute_value LIKE '%,%'  -- Filter records that have commas in attribute_value
+    {{ changed_since_last_run() }}
+),
+
+Attribute_Processing_Model AS (
+    SELECT 
+        business_id,
+        CONCAT(attribute_name, '_', f.key) AS attribute_name,  -- Dynamically concatenate attribute name and key
+        {{ flattened_value('f') }} AS attribute_value,  -- Extract corresponding values
+        updated_at
+    FROM Attribute,
+    {{ flatten_object('attributes_json', 'f') }}
+)
+
+SELECT * 
+FROM Attribute_Processing_Model
+WHERE attribute_value <>'null'
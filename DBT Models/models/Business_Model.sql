@@ -0,0 +1,54 @@
+
+/*
+    Welcome to your first dbt model!
+    Did you know that you can also configure models directly within SQL files?
+    This will override configurations stated in dbt_project.yml
+
+    Try changing "table" to "view" below
+*/
+
+{{ config(
+    materialized='incremental',
+    unique_key='business_id',
+    incremental_strategy='merge',
+    post_hook="{{ delete_stale_business_rows(\"is_open = '1' AND STATE IN ('PA','FL','TN','IN','MO') AND stars >= 3\") }}"
+) }}
+
+with Business_Model as (
+
+    select 
+    business_id,
+    Name,
+    ADDRESS,
+    city,
+    state,
+    Postal_code,
+    LATITUDE,
+    LONGITUDE,
+    stars,
+    REVIEW_COUNT,
+    Categories,
+    {{ json_text('hours', 'Monday') }} as Monday,
+    {{ json_text('hours', 'Tuesday') }} as Tuesday,
+    {{ json_text('hours', 'Wednesday') }} as Wednesday,
+    {{ json_text('hours', 'Thursday') }} as Thursday,
+    {{ json_text('hours', 'Friday') }} as Friday,
+    {{ json_text('hours', 'Saturday') }} as Saturday,
+    {{ json_text('hours', 'Sunday') }} as Sunday,
+    updated_at
+    from {{ business_source() }}
+    where is_open='1'
+    and STATE IN ('PA','FL','TN','IN','MO')
+    AND stars>=3
+    {{ changed_since_last_run() }}
+
+)
+
+select *
+from Business_Model
+
+/*
+    Uncomment the line below to remove records with null `id` values
+*/
+
+-- where id is not null
@@ -0,0 +1,22 @@
+
+-- Use the `ref` function to select from other models
+
+{{ config(
+    materialized='incremental',
+    unique_key='business_id',
+    incremental_strategy='delete+insert',
+    post_hook="{{ delete_stale_business_rows(\"is_open = '1' AND STATE IN ('PA','FL','TN','IN','MO')\") }}"
+) }}
+
+with Category_Model as (
+
+    SELECT b.business_id, TRIM(f.VALUE) AS Categories, b.updated_at
+    FROM {{ business_source() }} b,
+    {{ split_to_rows('b.CATEGORIES', ',', 'f') }}
+    where is_open='1'
+    and STATE IN ('PA','FL','TN','IN','MO')
+    {{ changed_since_last_run('b.updated_at') }}
+)
+
+select *
+from Category_Model
@@ -0,0 +1,31 @@
+{{ config(
+    materialized='incremental',
+    unique_key='business_id',
+    incremental_strategy='merge',
+    alias='Filtered_Attributes'
+) }}
+
+-- One row per business with its kept attributes as a JSON object, aggregated in the
+-- warehouse instead of pulling final_attribute_model into pandas and inserting row by row.
+-- Merged into the existing table by business_id, never recreated, so its grants and
+-- clustering and rows loaded by other jobs are kept.
+WITH Kept_Attributes AS (
+    SELECT
+        business_id,
+        attribute_name,
+        attribute_value
+    FROM {{ final_attribute_model() }}
+    WHERE UPPER(attribute_value) NOT LIKE '%FALSE%'
+      AND UPPER(attribute_value) <> 'NONE'
+      AND UPPER(attribute_value) <> 'NO'
+      AND attribute_value <> '{}'
+      AND LOWER(attribute_name) NOT LIKE '%restaurantspricerange%'
+    -- Object keys must be unique: keep one value per attribute
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY business_id, attribute_name ORDER BY attribute_value) = 1
+)
+
+SELECT
+    business_id,
+    {{ json_object_agg('attribute_name', 'attribute_value') }} AS attributes
+FROM Kept_Attributes
+GROUP BY business_id
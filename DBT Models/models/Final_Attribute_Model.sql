@@ -0,0 +1,31 @@
+{{ config(
+    materialized='incremental',
+    unique_key='business_id',
+    incremental_strategy='delete+insert',
+    post_hook="{{ delete_stale_business_rows(\"is_open = '1' AND STATE IN ('PA','FL','TN','IN','MO')\") }}"
+) }}
+
+WITH ATTRIBUTE as 
+(
+ SELECT business_id,attribute_name , 
+ replace(replace(ATTRIBUTE_VALUE,'""',''),'u''none''','Invalid')as attribute_value,
+ updated_at
+ FROM {{ ref('Attribute_Model') }}
+ where attribute_value not like '%,%'
+ {{ changed_since_last_run() }}
+), Attribute_Preprocessed as
+(
+    select * from {{ ref('Attribute_Processing_Model') }}
+    where 1 = 1
+    {{ changed_since_last_run() }}
+), a as
+(
+select * from ATTRIBUTE
+where attribute_value<>'Invalid'
+union all
+select * from Attribute_Preprocessed
+)
+select business_id,attribute_name,replace(replace (attribute_value,'u''',''),'''','') as attribute_value,updated_at
+from a
+where NOT CAST(attribute_value AS STRING) ILIKE 'none'
+    AND NOT CAST(attribute_value AS STRING) ILIKE 'None'
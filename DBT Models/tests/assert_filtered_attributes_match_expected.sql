@@ -0,0 +1,22 @@
+{{ config(enabled=(target.type == 'duckdb')) }}
+
+-- Filtered_Attribute_Model over the sample seed must yield exactly the expected
+-- (business, attribute, value) triples; every row returned is a mismatch
+WITH Actual AS (
+    SELECT
+        business_id,
+        attribute_name,
+        attributes::JSON ->> attribute_name AS attribute_value
+    FROM (
+        SELECT business_id, attributes, UNNEST(JSON_KEYS(attributes::JSON)) AS attribute_name
+        FROM {{ ref('Filtered_Attribute_Model') }}
+    )
+),
+Expected AS (
+    SELECT business_id, attribute_name, CAST(attribute_value AS VARCHAR) AS attribute_value
+    FROM {{ ref('filtered_attributes_expected') }}
+)
+
+(SELECT 'missing' AS problem, * FROM (SELECT * FROM Expected EXCEPT SELECT * FROM Actual))
+UNION ALL
+(SELECT 'unexpected' AS problem, * FROM (SELECT * FROM Actual EXCEPT SELECT * FROM Expected))
@@ -1,4 +1,5 @@
 import snowflake.connector
+from snowflake.connector.pandas_tools import write_pandas
 import pandas as pd
 import numpy as np
 import json
@@ -8,6 +9,12 @@ from sentence_transformers import SentenceTransformer ##    LLM model
 from langchain.schema import Document
 import base64
 import binascii
+import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data-ingestion"))
+from document_builder import embedding_texts, build_parallel
 
 # Snowflake connection setup
 conn = snowflake.connector.connect(
@@ -22,15 +29,6 @@ conn = snowflake.connector.connect(
 # Snowflake connection setup (assuming `conn` is already established)
 cursor = conn.cursor()
 
-
-truncate_query_2 = "TRUNCATE TABLE BUSINESS_EMBEDDINGS;"
-
-
-cursor.execute(truncate_query_2)
-cursor.close()
-
-cursor = conn.cursor()
-
 # Query to get the business data from Snowflake
 query = r"""
 SELECT business_id,name,latitude,longitude,categories,attributes,state ,POSTAL_CODE,stars, hours
@@ -49,37 +47,11 @@ df = pd.read_sql(query, conn)
 #df["FLATTENED_ATTRIBUTES"] = df["ATTRIBUTES"].apply(lambda x: flatten_attributes(json.loads(x)))
 #df['combined_info'] = df['CATEGORIES'] + " " + df['FLATTENED_ATTRIBUTES']
 
-def attributes_to_text(attr_json):
-    if not isinstance(attr_json, dict):
-        return ""
-    
-    descriptions = []
-    for key, value in attr_json.items():
-        if value.lower() in ['true', 'yes']:
-            if "Ambience_" in key:
-                descriptions.append(f"Ambience is {key.split('_')[-1]}")
-            elif "BusinessParking" in key:
-                descriptions.append(f"Has {key.split('_')[-1]} parking")
-            else:
-                descriptions.append(f"{key.replace('_', ' ')} available")
-        elif value.lower() not in ['false', 'no', 'null']:
-            descriptions.append(f"{key.replace('_', ' ')} is {value}")
-    
-    return ". ".join(descriptions)
-
-def hours_to_text(hours_json):
-    if not isinstance(hours_json, dict):
-        return ""
-    
-    return ". ".join([
-        f"Open on {day} from {time.replace(':0', ':00')}"
-        for day, time in hours_json.items() if time != "0:0-0:0"
-    ])
-
-
-
-df["FLATTENED_ATTRIBUTES"] = df["ATTRIBUTES"].apply(lambda x: attributes_to_text(json.loads(x)) if pd.notnull(x) else "")
-df["HOURS"] = df["HOURS"].apply(lambda x: hours_to_text(json.loads(x)) if pd.notnull(x) else "")
+# Attribute and hours JSON -> text for the whole table at once, split across processes
+# (see data-ingestion/document_builder.py)
+texts = build_parallel(embedding_texts, df[["ATTRIBUTES", "HOURS"]])
+df["FLATTENED_ATTRIBUTES"] = texts["FLATTENED_ATTRIBUTES"]
+df["HOURS"] = texts["HOURS"]
 df = df[~df["FLATTENED_ATTRIBUTES"].str.contains("RestaurantsPriceRange", na=False)]
 
 df["combined_info"] = (
@@ -113,62 +85,71 @@ combined_index.add(category_embeddings)
 
 #cursor.execute("PUT file://faiss_combined_businesses.index @faiss_index_stage auto_compress=false")
 
-def escape_string(s):
-    if isinstance(s, str):
-        return s.replace("'", "''").replace("\n", " ").replace("\r", " ")
-    return s
-
-
-for idx, row in df.iterrows():
-
-    business_id = (row['BUSINESS_ID'])
-    name = escape_string(row['NAME'])
-    latitude = row['LATITUDE']
-    longitude = row['LONGITUDE']
-    state = (row['STATE'])
-    categories = escape_string(row['CATEGORIES'])
-    flattened_attributes = escape_string(row['combined_info'])
-    embedding_str = json.dumps(category_embeddings[idx].tolist())  # Ensure that embedding is properly serialized
-    
-    # Construct SQL statement and print for debugging
-    insert_query = """
-    INSERT INTO BUSINESS_EMBEDDINGS (
-        BUSINESS_ID, 
-        NAME, 
-        LATITUDE, 
-        LONGITUDE, 
-        STATE, 
-        CATEGORIES, 
-        FLATTENED_ATTRIBUTES, 
-        EMBEDDING
-    ) 
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-"""
-
-data_to_insert = []
-
-for idx, row in df.iterrows():
-    business_id = row['BUSINESS_ID']
-    name = escape_string(row['NAME'])
-    latitude = row['LATITUDE']
-    longitude = row['LONGITUDE']
-    state = row['STATE']
-    categories = escape_string(row['CATEGORIES'])
-    flattened_attributes = escape_string(row['combined_info'])
-    embedding_str = json.dumps(category_embeddings[idx].tolist())
-
-    data_to_insert.append((
-        business_id,
-        name,
-        latitude,
-        longitude,
-        state,
-        categories,
-        flattened_attributes,
-        embedding_str
-    ))
-
-# Now batch insert
-cursor.executemany(insert_query, data_to_insert)
+# ------------------------
+# Bulk load: write_pandas stages the frame as compressed Parquet (PUT + COPY INTO) into a
+# scratch table, then one MERGE applies it. No TRUNCATE, so readers never see an empty
+# table and unchanged businesses leave no trace in the table's change tracking (the
+# chatbot's snapshot sync reads only changed rows).
+# ------------------------
+STAGE_TABLE = "BUSINESS_EMBEDDINGS_STAGE"
+COLUMNS = ["BUSINESS_ID", "NAME", "LATITUDE", "LONGITUDE", "STATE", "CATEGORIES", "FLATTENED_ATTRIBUTES", "EMBEDDING", "EMBEDDING_F32"]
+
+start = time.perf_counter()
+
+load_df = pd.DataFrame({
+    "BUSINESS_ID": df["BUSINESS_ID"],
+    "NAME": df["NAME"],
+    "LATITUDE": df["LATITUDE"],
+    "LONGITUDE": df["LONGITUDE"],
+    "STATE": df["STATE"],
+    "CATEGORIES": df["CATEGORIES"],
+    "FLATTENED_ATTRIBUTES": df["combined_info"],
+    # JSON text kept for ad-hoc SQL (PARSE_JSON(embedding)::VECTOR(FLOAT, 384))
+    "EMBEDDING": [json.dumps(vector) for vector in category_embeddings.tolist()],
+    # What the apps read: 384 little-endian float32s packed into BINARY(1536)
+    "EMBEDDING_F32": [vector.tobytes() for vector in np.ascontiguousarray(category_embeddings, dtype="<f4")],
+})
+for text_col in ["NAME", "CATEGORIES", "FLATTENED_ATTRIBUTES"]:
+    load_df[text_col] = load_df[text_col].str.replace(r"[\r\n]", " ", regex=True)
+# MERGE needs one source row per key
+load_df = load_df.drop_duplicates(subset="BUSINESS_ID", keep="last")
+
+success, n_chunks, n_rows, _ = write_pandas(
+    conn,
+    load_df,
+    table_name=STAGE_TABLE,
+    auto_create_table=True,
+    overwrite=True,
+    table_type="temporary",
+    compression="snappy",
+    quote_identifiers=False,
+)
+if not success:
+    raise RuntimeError(f"write_pandas failed to stage {len(load_df)} rows")
+
+updates = ", ".join(f"t.{c} = s.{c}" for c in COLUMNS[1:])
+changed = " OR ".join(f"t.{c} IS DISTINCT FROM s.{c}" for c in COLUMNS[1:])
+cursor.execute(f"""
+    MERGE INTO BUSINESS_EMBEDDINGS t
+    USING {STAGE_TABLE} s
+    ON t.BUSINESS_ID = s.BUSINESS_ID
+    WHEN MATCHED AND ({changed}) THEN UPDATE SET {updates}
+    WHEN NOT MATCHED THEN INSERT ({", ".join(COLUMNS)}) VALUES ({", ".join(f"s.{c}" for c in COLUMNS)})
+""")
+inserted, updated = cursor.fetchone()
+
+# Businesses that dropped out of ENGINEERED_BUSINESSES
+# (NOT EXISTS rather than NOT IN, which deletes nothing once any staged BUSINESS_ID is NULL)
+cursor.execute(f"""
+    DELETE FROM BUSINESS_EMBEDDINGS
+    WHERE NOT EXISTS (SELECT 1 FROM {STAGE_TABLE} s WHERE s.BUSINESS_ID = BUSINESS_EMBEDDINGS.BUSINESS_ID)
+""")
+deleted = cursor.fetchone()[0]
 conn.commit()
-cursor.close()
\ No newline at end of file
+cursor.close()
+
+elapsed = time.perf_counter() - start
+print(
+    f"✅ Loaded {n_rows} rows in {n_chunks} Parquet chunk(s) in {elapsed:.1f}s "
+    f"({n_rows / elapsed:,.0f} rows/sec): {inserted} inserted, {updated} updated, {deleted} deleted"
+)
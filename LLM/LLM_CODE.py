@@ -1,6 +1,7 @@
+import os
+import sys
 from sklearn.metrics.pairwise import cosine_similarity
 from sentence_transformers import SentenceTransformer
-from geopy.distance import geodesic
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut
 import numpy as np
@@ -10,6 +11,10 @@ import faiss
 import pandas as pd
 import io
 
+# The shared geo kernel lives in <repo>/common
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+from common.geo import within_radius
+
 
 conn = snowflake.connector.connect(
     user='BOA',
@@ -24,19 +29,15 @@ cursor = conn.cursor()
 #index = faiss.read_index("faiss_combined_businesses.index")
 
 
-cursor.execute("SELECT * FROM BUSINESS_EMBEDDINGS")
-data = cursor.fetchall()
-
-# Convert to pandas DataFrame
-columns = ['BUSINESS_ID', 'NAME', 'LATITUDE', 'LONGITUDE', 'STATE', 'CATEGORIES', 'FLATTENED_ATTRIBUTES', 'EMBEDDING']
-df = pd.DataFrame(data, columns=columns)
-
-
-# Convert EMBEDDING column from string to numpy array
-#df['EMBEDDING'] = df['EMBEDDING'].apply(lambda x: np.fromstring(x, sep=','))
-df['EMBEDDING'] = df['EMBEDDING'].apply(lambda x: x.strip('[]').replace(' ', '').split(',') if isinstance(x, str) else x)
+cursor.execute("""
+    SELECT BUSINESS_ID, NAME, LATITUDE, LONGITUDE, STATE, CATEGORIES, FLATTENED_ATTRIBUTES, EMBEDDING_F32
+    FROM BUSINESS_EMBEDDINGS
+""")
+df = cursor.fetch_pandas_all()
 
-df['EMBEDDING'] = df['EMBEDDING'].apply(lambda x: np.array(x, dtype=float) if isinstance(x, list) else x)
+# EMBEDDING_F32 holds packed little-endian float32, so decoding is a single buffer copy
+embeddings = np.frombuffer(b"".join(df.pop('EMBEDDING_F32')), dtype='<f4').reshape(-1, 384)
+df['EMBEDDING'] = list(embeddings)
 
 geolocator = Nominatim(user_agent="geopyApp")
 
@@ -59,10 +60,11 @@ user_location_query = input("Enter the city or location you want to find: ")
 # Get latitude and longitude of the user's input city
 latitude, longitude = get_lat_lon(user_location_query)
 
-df['DISTANCE'] = df.apply(lambda row: geodesic((latitude, longitude), (row['LATITUDE'], row['LONGITUDE'])).km, axis=1)
+# Haversine over every business, geodesic only for those near the 5 km edge
+in_radius, df['DISTANCE'] = within_radius(latitude, longitude, df['LATITUDE'], df['LONGITUDE'], radius_km=5, exact=True)
 
 
-df = df[df['DISTANCE'] <= 5]
+df = df[in_radius]
 
 embedding_size = len( df['EMBEDDING'].iloc[0])  
 
@@ -101,8 +103,7 @@ def calculate_similarity_score(query_text):
             'LONGITUDE': business_data['LONGITUDE'],
             'STATE': business_data['STATE'],
             'SIMILARITY_SCORE': cosine_sim,
-            'DISTANCE': geodesic((latitude, longitude), 
-                                 (business_data['LATITUDE'], business_data['LONGITUDE'])).km
+            'DISTANCE': business_data['DISTANCE']
         })
 
     return retrieved_businesses_with_scores
@@ -1,14 +1,19 @@
+import os
+import sys
 import streamlit as st
 import pandas as pd
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
 from sklearn.metrics.pairwise import cosine_similarity
 from scipy.spatial.distance import euclidean
 import faiss
 import snowflake.connector
 
+# The shared geo kernel lives in <repo>/common
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+from common.geo import within_radius
+
 # --- Connect to Snowflake ---
 @st.cache_resource
 def load_data_from_snowflake():
@@ -24,8 +29,7 @@ def load_data_from_snowflake():
 
     query = """
     SELECT BUSINESS_ID, NAME, LATITUDE, LONGITUDE, STATE,
-        CATEGORIES, FLATTENED_ATTRIBUTES,
-        PARSE_JSON(embedding)::VECTOR(FLOAT, 384) AS EMBEDDING
+        CATEGORIES, FLATTENED_ATTRIBUTES, EMBEDDING_F32
     FROM BUSINESS_EMBEDDINGS
     """
 
@@ -33,6 +37,10 @@ def load_data_from_snowflake():
     df = cursor.fetch_pandas_all()  # ✅ Get results as DataFrame
 
     conn.close()
+
+    # ✅ Packed float32 bytes -> one (N, 384) matrix; each row's EMBEDDING is a view into it
+    embeddings = np.frombuffer(b"".join(df.pop("EMBEDDING_F32")), dtype="<f4").reshape(-1, 384)
+    df["EMBEDDING"] = list(embeddings)
     return df
 
         # --- Get user location ---
@@ -51,8 +59,8 @@ def run_similarity_search(user_text, user_location, df):
     if latitude is None:
         return pd.DataFrame()
 
-    df['DISTANCE'] = df.apply(lambda row: geodesic((latitude, longitude), (row['LATITUDE'], row['LONGITUDE'])).km, axis=1)
-    df_filtered = df[df['DISTANCE'] <= 5].copy()
+    in_radius, df['DISTANCE'] = within_radius(latitude, longitude, df['LATITUDE'], df['LONGITUDE'], radius_km=5, exact=True)
+    df_filtered = df[in_radius].copy()
     
     if df_filtered.empty:
         return pd.DataFrame()
@@ -66,8 +74,9 @@ def run_similarity_search(user_location, query_input, df):
         return pd.DataFrame()  # If location lookup fails, return empty DataFrame
     
     # Filter businesses based on distance from the user (5 km radius)
-    df['DISTANCE'] = df.apply(lambda row: geodesic((latitude, longitude), (row['LATITUDE'], row['LONGITUDE'])).km, axis=1)
-    df_filtered = df[df['DISTANCE'] <= 5].copy()  # Filter businesses within 5 km of user
+    # (haversine over every business, geodesic only for those near the 5 km edge)
+    in_radius, df['DISTANCE'] = within_radius(latitude, longitude, df['LATITUDE'], df['LONGITUDE'], radius_km=5, exact=True)
+    df_filtered = df[in_radius].copy()  # Filter businesses within 5 km of user
     
     if df_filtered.empty:
         return pd.DataFrame()  # Return empty if no businesses are within the 5 km range
@@ -0,0 +1,78 @@
+# benchmark/report.py
+#
+# Side-by-side comparison of two benchmark/run.py reports, e.g. before and after a change:
+#   python -m benchmark.report old.json new.json [--metric p95_ms] [--threshold 10]
+# Exits with status 1 when any stage got slower than the threshold, so it can gate CI.
+
+import sys
+import json
+
+METRICS = ["p50_ms", "p95_ms", "p99_ms", "mean_ms", "max_ms"]
+# Settings that make two reports incomparable when they differ
+COMPARABLE = [("dataset", "rows"), ("dataset", "seed"), ("config", "encoder"), ("config", "faiss_kind"), ("config", "top_k")]
+
+
+def load_report(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def mismatches(old, new):
+    """Descriptions of the dataset/config settings that differ between the reports."""
+    return [
+        f"{section}.{key}: {old[section].get(key)} -> {new[section].get(key)}"
+        for section, key in COMPARABLE
+        if old[section].get(key) != new[section].get(key)
+    ]
+
+
+def compare(old, new, metric="p95_ms"):
+    """One row per (backend, stage) in either report: old and new value of metric and the change in %."""
+    rows = []
+    for backend in sorted(set(old["backends"]) | set(new["backends"])):
+        old_stages = old["backends"].get(backend, {}).get("stages", {})
+        new_stages = new["backends"].get(backend, {}).get("stages", {})
+        for stage in list(dict.fromkeys(list(old_stages) + list(new_stages))):
+            before = (old_stages.get(stage) or {}).get(metric)
+            after = (new_stages.get(stage) or {}).get(metric)
+            change = None
+            if before and after is not None:
+                change = round((after - before) / before * 100, 1)
+            rows.append({"backend": backend, "stage": stage, "old": before, "new": after, "change_pct": change})
+    return rows
+
+
+def format_rows(rows, metric, threshold):
+    lines = [f"{'backend':<14} {'stage':<11} {'old ' + metric:>14} {'new ' + metric:>14} {'change':>9}"]
+    for row in rows:
+        old = "-" if row["old"] is None else f"{row['old']:.3f}"
+        new = "-" if row["new"] is None else f"{row['new']:.3f}"
+        change = "-" if row["change_pct"] is None else f"{row['change_pct']:+.1f}%"
+        flag = " ⚠️" if row["change_pct"] is not None and row["change_pct"] > threshold else ""
+        lines.append(f"{row['backend']:<14} {row['stage']:<11} {old:>14} {new:>14} {change:>9}{flag}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--metric", choices=METRICS, default="p95_ms")
+    parser.add_argument("--threshold", type=float, default=10.0, help="% slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    old, new = load_report(args.old), load_report(args.new)
+    for mismatch in mismatches(old, new):
+        print(f"⚠️ Reports are not comparable: {mismatch}")
+    print(f"{old['git'].get('commit') or '?'}  ->  {new['git'].get('commit') or '?'}")
+
+    rows = compare(old, new, args.metric)
+    print(format_rows(rows, args.metric, args.threshold))
+
+    regressions = [r for r in rows if r["change_pct"] is not None and r["change_pct"] > args.threshold]
+    if regressions:
+        print(f"❌ {len(regressions)} stage(s) more than {args.threshold:g}% slower")
+        sys.exit(1)
+    print("✅ No regressions")
@@ -0,0 +1,361 @@
+# benchmark/run.py
+#
+# Times run_similarity_search of both chatbots stage by stage (geocode, geo filter, encode,
+# search, result assembly) over a dataset from benchmark/generate.py, and writes the
+# p50/p95/p99 of every stage to a JSON report (compare two with benchmark/report.py).
+# Nothing touches Snowflake or the network: the FAISS index, gazetteer and Chroma
+# collection are built from the dataset, next to it, the first time a backend runs.
+# Run from the repository root:
+#   python -m benchmark.run --data .benchmark/data-100k [--backends faiss,chroma] [--encoder hashed]
+
+import os
+import sys
+import json
+import time
+import shutil
+import inspect
+import platform
+import functools
+import subprocess
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from chromadb import EmbeddingFunction
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+REPORT_VERSION = 1
+
+# Backend -> app folder. Both apps import their modules as `utils`, so every backend
+# runs in a fresh interpreter.
+BACKENDS = {
+    "faiss": "Chatbot - FAISS_Implement",
+    "chroma": "Chatbot",            # the message names the city ("tacos in Tampa")
+    "chroma-nearby": "Chatbot",     # around_location is set, as in planning mode
+}
+STAGES = ["geocode", "geo_filter", "encode", "search", "assembly"]
+CHROMA_COLLECTION = "street_fairy_business_kb"
+
+
+class StageTimer:
+    """Wall time per stage of the wrapped functions, exclusive of wrapped functions they call."""
+
+    def __init__(self):
+        self.totals = {}
+        self._children = []
+
+    def reset(self):
+        self.totals = {}
+
+    def wrap(self, fn, stage):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            self._children.append(0.0)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = self._children.pop()
+                self.totals[stage] = self.totals.get(stage, 0.0) + elapsed - nested
+                if self._children:
+                    self._children[-1] += elapsed
+        return timed
+
+    def patch(self, module, names, stage):
+        for name in names:
+            setattr(module, name, self.wrap(getattr(module, name), stage))
+
+
+class TimedCollection:
+    """Chroma collection whose query/get calls count as the search stage."""
+
+    def __init__(self, collection, timer):
+        self._collection = collection
+        self.query = timer.wrap(collection.query, "search")
+        self.get = timer.wrap(collection.get, "search")
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+class HashingEncoder(EmbeddingFunction):
+    """Stand-in for the sentence-transformers model (--encoder hashed).
+
+    Embeds text like benchmark/generate.py embeds the businesses, so the index and
+    filter stages can be measured on machines without the model weights.
+    """
+
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        # Chroma embedding function interface
+        from benchmark.generate import text_vectors
+        return list(text_vectors(list(input)))
+
+    def encode(self, sentences, convert_to_numpy=True, **kwargs):
+        # SentenceTransformer interface
+        from benchmark.generate import text_vectors
+        return text_vectors(list(sentences))
+
+
+def summarize(seconds):
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    if len(ms) == 0:
+        return None
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+# ------------------------
+# Per-backend setup (runs inside the worker process)
+# ------------------------
+def _setup_faiss(data_dir, df, kind):
+    """Index + gazetteer for the dataset (built once per kind), and the search call."""
+    from utils import index, geocode, query
+    from utils.snapshot import METADATA_COLUMNS
+
+    build_s = None
+    manifest = index.read_manifest()
+    if manifest is None or manifest["count"] != len(df) or manifest["kind"] != kind:
+        start = time.perf_counter()
+        embeddings = np.load(os.path.join(data_dir, "embeddings.npy"))
+        index.build_index(df, embeddings, kind=kind)
+        # Same aggregation as geocode.fetch_places() runs in Snowflake
+        places = (
+            df.groupby(["CITY", "STATE", "POSTAL_CODE"], as_index=False)
+            .agg(LATITUDE=("LATITUDE", "mean"), LONGITUDE=("LONGITUDE", "mean"), BUSINESSES=("BUSINESS_ID", "size"))
+        )
+        geocode.build_gazetteer(places)
+        build_s = round(time.perf_counter() - start, 2)
+
+    timer = StageTimer()
+    timer.patch(query, ["get_lat_lon"], "geocode")
+    timer.patch(query, ["load_geo_index", "load_row_categories", "radius_query", "exclude_categories", "haversine_km"], "geo_filter")
+    timer.patch(query, ["encode_query"], "encode")
+    timer.patch(query, ["load_index", "search_index"], "search")
+
+    meta = df[METADATA_COLUMNS]
+    # The undecorated function: st.cache_data would answer repeated queries from its cache
+    search = inspect.unwrap(query.run_similarity_search)
+
+    def call(q, top_k):
+        return len(search(q["location"], q["text"], meta, top_k=top_k))
+
+    return timer, call, build_s
+
+
+def _setup_chroma(data_dir, df, nearby, seed):
+    """Collection for the dataset (built once), and the search call."""
+    import chromadb
+    from utils import query
+    from document_builder import business_records
+
+    build_s = None
+    client = chromadb.PersistentClient(path=query.CHROMA_DIR)
+    if CHROMA_COLLECTION in [c.name for c in client.list_collections()]:
+        if client.get_collection(CHROMA_COLLECTION).count() != len(df):
+            client.delete_collection(CHROMA_COLLECTION)
+    collection = query.load_chroma_collection()
+    if collection.count() == 0:
+        start = time.perf_counter()
+        embeddings = np.load(os.path.join(data_dir, "embeddings.npy"), mmap_mode="r")
+        batch_size = client.get_max_batch_size()
+        for begin in range(0, len(df), batch_size):
+            records = business_records(df.iloc[begin:begin + batch_size].to_dict("records"))
+            collection.add(
+                ids=[biz_id for biz_id, doc, meta in records],
+                embeddings=np.asarray(embeddings[begin:begin + batch_size]),
+                documents=[doc for biz_id, doc, meta in records],
+                metadatas=[meta for biz_id, doc, meta in records],
+            )
+        build_s = round(time.perf_counter() - start, 2)
+
+    timer = StageTimer()
+    timed_collection = TimedCollection(collection, timer)
+    query.load_chroma_collection = lambda: timed_collection
+    timer.patch(query, ["resolve_place"], "geocode")
+    timer.patch(query, ["load_geo_index", "radius_query", "haversine_km", "bounding_box"], "geo_filter")
+    timer.patch(query, ["encode_query"], "encode")
+    timer.patch(query, ["query_local", "query_nearby"], "search")
+
+    # Planning mode searches around a point picked near the city centre
+    rng = np.random.default_rng(seed)
+
+    def call(q, top_k):
+        if nearby:
+            lat = q["latitude"] + rng.normal(0.0, 0.01)
+            lon = q["longitude"] + rng.normal(0.0, 0.01)
+            return len(query.run_similarity_search(q["text"], top_k=top_k, around_location=(lat, lon)))
+        return len(query.run_similarity_search(f"{q['text']} in {q['city']}", top_k=top_k))
+
+    return timer, call, build_s
+
+
+def run_backend(backend, data_dir, queries, warmup, top_k, encoder, kind, seed):
+    """Run one backend's workload in this (fresh) process and return its report section."""
+    work_dir = os.path.join(data_dir, "stores")
+    os.environ["FAISS_INDEX_DIR"] = os.path.join(work_dir, f"faiss-{kind}")
+    os.environ["FAISS_INDEX_KIND"] = kind
+    os.environ["CHROMA_DIR"] = os.path.join(work_dir, "chroma")
+    # A fresh query embedding cache per run, so every distinct query is encoded once
+    cache_dir = os.path.join(work_dir, f"query-cache-{backend}")
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.environ["QUERY_EMBEDDING_CACHE"] = os.path.join(cache_dir, "query_embeddings.sqlite")
+    # The model must come from the local Hugging Face cache
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+    # Locations the gazetteer misses count as empty results instead of Nominatim round trips
+    os.environ["GEOCODE_ALLOW_NETWORK"] = "0"
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    # No per-turn trace lines or metrics file; the benchmark keeps its own timings
+    os.environ["METRICS_PATH"] = ""
+    os.environ.setdefault("TRACE_LOG_LEVEL", "WARNING")
+
+    sys.path.insert(0, ROOT_DIR)   # the shared modules in common/
+    sys.path.insert(0, os.path.join(ROOT_DIR, BACKENDS[backend]))
+    sys.path.insert(0, os.path.join(ROOT_DIR, "data-ingestion"))
+    from common import embeddings
+    from utils import query
+
+    if encoder == "hashed":
+        stand_in = HashingEncoder()
+        embeddings.load_embedding_model = lambda model_name: stand_in
+        if backend != "faiss":
+            query.load_embedding_fn = lambda model_name=query.MODEL_NAME: stand_in
+    else:
+        try:
+            embeddings.warm_up(query.MODEL_NAME)
+        except Exception as e:
+            raise RuntimeError(
+                f"Could not load {query.MODEL_NAME} from the local model cache ({e}). "
+                "Download it once, or run with --encoder hashed."
+            ) from e
+
+    df = pd.read_parquet(os.path.join(data_dir, "businesses.parquet"))
+    if backend == "faiss":
+        timer, call, build_s = _setup_faiss(data_dir, df, kind)
+    else:
+        timer, call, build_s = _setup_chroma(data_dir, df, backend == "chroma-nearby", seed)
+
+    # The first query pays for loading the index, geo index and caches
+    start = time.perf_counter()
+    call(queries[0], top_k)
+    cold_start_ms = round((time.perf_counter() - start) * 1000, 1)
+    for q in queries[1:warmup]:
+        call(q, top_k)
+
+    samples = {stage: [] for stage in STAGES + ["total"]}
+    result_counts = []
+    for q in queries[warmup:]:
+        timer.reset()
+        start = time.perf_counter()
+        result_counts.append(call(q, top_k))
+        total = time.perf_counter() - start
+        for stage in STAGES[:-1]:
+            samples[stage].append(timer.totals.get(stage, 0.0))
+        # Whatever run_similarity_search does outside the timed calls
+        samples["assembly"].append(total - sum(timer.totals.values()))
+        samples["total"].append(total)
+
+    return {
+        "app": BACKENDS[backend],
+        "build_s": build_s,
+        "cold_start_ms": cold_start_ms,
+        "queries": len(result_counts),
+        "empty_results": int(sum(count == 0 for count in result_counts)),
+        "mean_results": round(float(np.mean(result_counts)), 2) if result_counts else 0.0,
+        "stages": {stage: summarize(values) for stage, values in samples.items()},
+        "embedding_cache": embeddings.cache_info(),
+    }
+
+
+# ------------------------
+# Report
+# ------------------------
+def _git_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def _environment():
+    versions = {}
+    for name in ["numpy", "pandas", "faiss", "chromadb", "sklearn", "sentence_transformers"]:
+        try:
+            versions[name] = __import__(name).__version__
+        except Exception:
+            versions[name] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def run(data_dir, backends, n_queries=200, warmup=10, top_k=5, encoder="model", kind="flat", seed=0):
+    """Benchmark every backend on the dataset in data_dir and return the report dict."""
+    with open(os.path.join(data_dir, "manifest.json"), "r") as f:
+        dataset = json.load(f)
+    with open(os.path.join(data_dir, "queries.json"), "r") as f:
+        queries = json.load(f)[:warmup + n_queries]
+
+    report = {
+        "report_version": REPORT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": _git_info(),
+        "environment": _environment(),
+        "dataset": dataset,
+        "config": {"queries": len(queries) - warmup, "warmup": warmup, "top_k": top_k, "encoder": encoder, "faiss_kind": kind},
+        "backends": {},
+    }
+    for backend in backends:
+        print(f"⏱️ Benchmarking {backend} on {dataset['rows']} businesses...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+            result = pool.submit(run_backend, backend, data_dir, queries, warmup, top_k, encoder, kind, seed).result()
+        report["backends"][backend] = result
+        total = result["stages"]["total"]
+        print(f"   p50 {total['p50_ms']} ms, p95 {total['p95_ms']} ms, p99 {total['p99_ms']} ms "
+              f"({result['empty_results']} of {result['queries']} queries without results)")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark run_similarity_search stage by stage on a generated dataset")
+    parser.add_argument("--data", required=True, help="dataset directory from benchmark/generate.py")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help=f"comma-separated subset of {', '.join(BACKENDS)}")
+    parser.add_argument("--queries", type=int, default=200, help="timed queries per backend")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed queries run first")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--encoder", choices=["model", "hashed"], default="model",
+                        help="the apps' sentence-transformers model (from the local cache) or a hashed bag-of-words stand-in")
+    parser.add_argument("--kind", default="flat", help="FAISS index kind (see utils/index.py INDEX_KINDS)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="report path (default <data>/report-<timestamp>.json)")
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    unknown = [b for b in backends if b not in BACKENDS]
+    if unknown:
+        parser.error(f"unknown backend(s): {', '.join(unknown)}")
+
+    data_dir = os.path.abspath(args.data)
+    report = run(data_dir, backends, args.queries, args.warmup, args.top_k, args.encoder, args.kind, args.seed)
+    out = args.out or os.path.join(data_dir, f"report-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Report written to {out}")
@@ -0,0 +1,128 @@
+# common/embeddings.py
+#
+# Query encoding for both apps, parameterised by the model each app's business vectors
+# were built with. The model is loaded once per process and name; encoded queries are
+# kept in an in-process LRU and in a SQLite table on disk (least recently used dropped).
+
+import os
+import time
+import sqlite3
+import threading
+import functools
+import numpy as np
+import streamlit as st
+from sentence_transformers import SentenceTransformer
+from . import tracing
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+EMBEDDING_CACHE_PATH = os.environ.get("QUERY_EMBEDDING_CACHE", os.path.join(ROOT_DIR, ".cache", "query_embeddings.sqlite"))
+
+MEMORY_CACHE_SIZE = 1024   # queries kept in the in-process LRU
+DISK_CACHE_SIZE = 50000    # queries kept on disk, least recently used dropped first
+
+cache_stats = {"disk_hits": 0, "misses": 0}
+_store_lock = threading.Lock()
+
+
+# Load embedding model once per process
+@st.cache_resource(show_spinner=False)
+def load_embedding_model(model_name):
+    return SentenceTransformer(model_name)
+
+
+@st.cache_resource(show_spinner=False)
+def load_embedding_store(path=EMBEDDING_CACHE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS query_embeddings (
+            model TEXT NOT NULL,
+            query TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            last_access REAL NOT NULL,
+            PRIMARY KEY (model, query)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS query_embeddings_last_access ON query_embeddings (last_access)")
+    conn.commit()
+    return conn
+
+
+def normalize_query(text):
+    # The MiniLM tokenizers are uncased, so case and spacing never change the vector
+    return " ".join(str(text).lower().split())
+
+
+def _read_vector(model_name, text):
+    with _store_lock:
+        conn = load_embedding_store()
+        row = conn.execute(
+            "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?", (model_name, text)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE query_embeddings SET last_access = ? WHERE model = ? AND query = ?", (time.time(), model_name, text)
+        )
+        conn.commit()
+    return np.frombuffer(row[0], dtype=np.float32)
+
+
+def _write_vector(model_name, text, vector):
+    with _store_lock:
+        conn = load_embedding_store()
+        conn.execute(
+            "INSERT OR REPLACE INTO query_embeddings (model, query, vector, last_access) VALUES (?, ?, ?, ?)",
+            (model_name, text, vector.astype(np.float32).tobytes(), time.time())
+        )
+        conn.execute("""
+            DELETE FROM query_embeddings WHERE rowid IN (
+                SELECT rowid FROM query_embeddings ORDER BY last_access
+                LIMIT MAX(0, (SELECT COUNT(*) FROM query_embeddings) - ?)
+            )
+        """, (DISK_CACHE_SIZE,))
+        conn.commit()
+
+
+@functools.lru_cache(maxsize=MEMORY_CACHE_SIZE)
+def _cached_vector(model_name, text):
+    vector = _read_vector(model_name, text)
+    tracing.record(embedding_cache="miss" if vector is None else "disk")
+    if vector is None:
+        cache_stats["misses"] += 1
+        vector = load_embedding_model(model_name).encode([text], convert_to_numpy=True)[0].astype(np.float32)
+        _write_vector(model_name, text, vector)
+    else:
+        cache_stats["disk_hits"] += 1
+    vector.setflags(write=False)  # shared by every caller that hits the LRU
+    return vector
+
+
+@tracing.traced("encode")
+def encode_query(query_input, model_name):
+    """Encode one query with model_name into a (1, dim) float32 array, going through the LRU and disk caches first."""
+    # Overwritten with disk/miss when the LRU does not have the query
+    tracing.record(embedding_cache="memory")
+    return _cached_vector(model_name, normalize_query(query_input)).reshape(1, -1).copy()
+
+
+def cache_info():
+    """Hit/miss counters for the query embedding caches."""
+    info = _cached_vector.cache_info()
+    return {
+        "memory_hits": info.hits,
+        "disk_hits": cache_stats["disk_hits"],
+        "misses": cache_stats["misses"],
+        "memory_size": info.currsize,
+    }
+
+
+tracing.register_gauges("embedding_cache", cache_info)
+
+
+@st.cache_resource(show_spinner=False)
+def warm_up(model_name):
+    """Load the model and run one throwaway encode, so the first chat turn costs the same as the rest."""
+    load_embedding_model(model_name).encode(["warm up"], convert_to_numpy=True)
+    return True
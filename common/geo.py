@@ -0,0 +1,69 @@
+# common/geo.py
+#
+# Distance kernels and the BallTree radius index shared by both apps and the LLM/ scripts.
+# Haversine runs vectorized over every point; the slower geopy geodesic is only used
+# to settle the few points near a radius edge (exact=True).
+
+import numpy as np
+from geopy.distance import geodesic
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Haversine (sphere) and geodesic (WGS-84 ellipsoid) distances differ by at most ~0.5%
+HAVERSINE_ERROR = 0.005
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance in km from (lat, lon) to every point in lats/lons, in one vectorized pass."""
+    lat1 = np.radians(lat)
+    lon1 = np.radians(lon)
+    lats = np.radians(np.ascontiguousarray(lats, dtype=np.float64))
+    lons = np.radians(np.ascontiguousarray(lons, dtype=np.float64))
+
+    a = np.sin((lats - lat1) / 2.0) ** 2 + np.cos(lat1) * np.cos(lats) * np.sin((lons - lon1) / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def geodesic_km(lat, lon, lats, lons):
+    """Geodesic (WGS-84) distance in km from (lat, lon) to every point in lats/lons. Slower than haversine; use it on few points."""
+    return np.array([geodesic((lat, lon), (p_lat, p_lon)).km for p_lat, p_lon in zip(lats, lons)], dtype=np.float64)
+
+
+def within_radius(lat, lon, lats, lons, radius_km=5.0, exact=False):
+    """Mask of the points within radius_km of (lat, lon), and every point's distance in km.
+
+    For a table scan without a BallTree. With exact=True, like radius_query, the points within the
+    radius widened by the haversine error margin get their geodesic distance, and only that decides.
+    """
+    distances = haversine_km(lat, lon, lats, lons)
+    if not exact:
+        return distances <= radius_km, distances
+
+    near = distances <= radius_km * (1 + HAVERSINE_ERROR)
+    distances[near] = geodesic_km(lat, lon, np.asarray(lats)[near], np.asarray(lons)[near])
+    return near & (distances <= radius_km), distances
+
+
+def build_geo_index(lats, lons):
+    """Haversine BallTree over business coordinates. Build it once and reuse it for every radius query."""
+    coords = np.radians(np.column_stack([
+        np.asarray(lats, dtype=np.float64),
+        np.asarray(lons, dtype=np.float64),
+    ]))
+    return BallTree(coords, metric="haversine")
+
+
+def radius_query(tree, lat, lon, radius_km=5.0, exact=False):
+    """Row ids of the points within radius_km of (lat, lon), read from the tree instead of scanning the table.
+
+    With exact=True the tree is asked for a radius widened by the haversine error margin,
+    and the few rows it returns are kept only if their geodesic distance is within radius_km.
+    """
+    center = np.radians([[lat, lon]])
+    if not exact:
+        return tree.query_radius(center, r=radius_km / EARTH_RADIUS_KM)[0]
+
+    rows = tree.query_radius(center, r=radius_km * (1 + HAVERSINE_ERROR) / EARTH_RADIUS_KM)[0]
+    points = np.degrees(np.asarray(tree.data)[rows])
+    return rows[geodesic_km(lat, lon, points[:, 0], points[:, 1]) <= radius_km]
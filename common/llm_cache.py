@@ -0,0 +1,95 @@
+# common/llm_cache.py
+#
+# SQLite cache of Ollama answers keyed by (model, options, sha256(prompt)).
+# The recommendation prompts are fully determined by the user message and the
+# businesses we found, so identical searches can reuse the earlier answer.
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+LLM_CACHE_PATH = os.path.join(ROOT_DIR, ".cache", "llm_responses.sqlite")
+
+CACHE_TTL_S = int(os.environ.get("LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+cache_stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+_conn = None
+_lock = threading.Lock()
+
+
+def _connection():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(LLM_CACHE_PATH), exist_ok=True)
+        _conn = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                model TEXT NOT NULL,
+                options TEXT NOT NULL,
+                prompt_sha256 TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, options, prompt_sha256)
+            )
+        """)
+        _conn.execute("CREATE INDEX IF NOT EXISTS llm_responses_last_access ON llm_responses (last_access)")
+        _conn.commit()
+    return _conn
+
+
+def _key(model, prompt, options):
+    return model, json.dumps(options or {}, sort_keys=True), hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def get_response(model, prompt, options=None):
+    """Cached answer for this exact prompt, or None if missing or older than CACHE_TTL_S."""
+    key = _key(model, prompt, options)
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        row = conn.execute(
+            "SELECT response, created_at FROM llm_responses WHERE model = ? AND options = ? AND prompt_sha256 = ?", key
+        ).fetchone()
+
+        if row is not None and now - row[1] > CACHE_TTL_S:
+            conn.execute("DELETE FROM llm_responses WHERE model = ? AND options = ? AND prompt_sha256 = ?", key)
+            conn.commit()
+            cache_stats["expired"] += 1
+            row = None
+
+        if row is None:
+            cache_stats["misses"] += 1
+            return None
+
+        conn.execute(
+            "UPDATE llm_responses SET last_access = ? WHERE model = ? AND options = ? AND prompt_sha256 = ?", (now, *key)
+        )
+        conn.commit()
+        cache_stats["hits"] += 1
+        return row[0]
+
+
+def put_response(model, prompt, response, options=None):
+    """Store an answer, then evict the least recently used rows beyond CACHE_MAX_ENTRIES."""
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?, ?)",
+            (*_key(model, prompt, options), response, now, now)
+        )
+        evicted = conn.execute("""
+            DELETE FROM llm_responses WHERE rowid IN (
+                SELECT rowid FROM llm_responses ORDER BY last_access
+                LIMIT MAX(0, (SELECT COUNT(*) FROM llm_responses) - ?)
+            )
+        """, (CACHE_MAX_ENTRIES,)).rowcount
+        conn.commit()
+        cache_stats["evicted"] += max(evicted, 0)
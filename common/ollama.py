@@ -0,0 +1,179 @@
+# common/ollama.py
+#
+# Shared Ollama client: one keep-alive connection pool per process, connect/read
+# timeouts, retries on connection errors, and a cap on generations in flight so
+# concurrent Streamlit sessions queue here instead of piling onto the local model.
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from . import llm_cache, tracing
+
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
+MAX_CONCURRENT_GENERATIONS = int(os.environ.get("OLLAMA_MAX_CONCURRENT", "2"))
+CONNECT_TIMEOUT = 3.05   # seconds to open a connection
+READ_TIMEOUT = 120       # seconds of silence before a generation counts as hung
+QUEUE_TIMEOUT = 60       # seconds to wait for a free generation slot
+
+
+class OllamaBusyError(RuntimeError):
+    """Raised when no generation slot frees up within QUEUE_TIMEOUT."""
+
+
+_session = None
+_session_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT_GENERATIONS)
+_stats_lock = threading.Lock()
+queue_stats = {
+    "generations": 0,
+    "waiting": 0,
+    "in_flight": 0,
+    "rejected": 0,
+    "total_wait_s": 0.0,
+    "max_wait_s": 0.0,
+}
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            retries = Retry(
+                total=2,
+                connect=2,
+                read=0,  # never replay a generation that already started
+                status=2,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=frozenset(["POST"]),
+                backoff_factor=0.5,
+            )
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENT_GENERATIONS * 2, max_retries=retries)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+
+@contextmanager
+def _generation_slot():
+    start = time.perf_counter()
+    with _stats_lock:
+        queue_stats["waiting"] += 1
+    acquired = _slots.acquire(timeout=QUEUE_TIMEOUT)
+    waited = time.perf_counter() - start
+
+    with _stats_lock:
+        queue_stats["waiting"] -= 1
+        if acquired:
+            queue_stats["generations"] += 1
+            queue_stats["in_flight"] += 1
+            queue_stats["total_wait_s"] += waited
+            queue_stats["max_wait_s"] = max(queue_stats["max_wait_s"], waited)
+        else:
+            queue_stats["rejected"] += 1
+    tracing.record(queue_wait_s=round(waited, 3))
+    if not acquired:
+        raise OllamaBusyError(f"Ollama is busy: no generation slot freed up within {QUEUE_TIMEOUT}s")
+
+    try:
+        yield
+    finally:
+        _slots.release()
+        with _stats_lock:
+            queue_stats["in_flight"] -= 1
+
+
+def queue_metrics():
+    """Snapshot of the generation queue counters, plus the mean queue wait."""
+    with _stats_lock:
+        metrics = dict(queue_stats)
+    metrics["mean_wait_s"] = metrics["total_wait_s"] / metrics["generations"] if metrics["generations"] else 0.0
+    return metrics
+
+
+tracing.register_gauges("ollama_queue", queue_metrics)
+tracing.register_gauges("llm_cache", lambda: dict(llm_cache.cache_stats))
+
+
+def _record_usage(body):
+    # Ollama's last response object carries token counts and durations (in nanoseconds)
+    generation_s = body.get("eval_duration", 0) / 1e9
+    tracing.record(
+        prompt_tokens=body.get("prompt_eval_count", 0),
+        completion_tokens=body.get("eval_count", 0),
+        generation_s=round(generation_s, 3),
+        tokens_per_s=round(body.get("eval_count", 0) / generation_s, 1) if generation_s else None,
+    )
+
+
+@tracing.traced("llm")
+def query_ollama(prompt, model="mistral", options=None, use_cache=True):
+    """Generate a full answer. Identical (model, options, prompt) calls are served from llm_cache unless use_cache=False."""
+    tracing.record(model=model)
+    if use_cache:
+        cached = llm_cache.get_response(model, prompt, options)
+        tracing.record(llm_cache="miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
+
+    payload = {"model": model, "prompt": prompt, "stream": False}
+    if options:
+        payload["options"] = options
+    with _generation_slot():
+        response = get_session().post(
+            f"{OLLAMA_URL}/api/generate", json=payload, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+    response.raise_for_status()
+    body = response.json()
+    answer = body["response"]
+    _record_usage(body)
+
+    if use_cache:
+        llm_cache.put_response(model, prompt, answer, options)
+    return answer
+
+
+@tracing.traced("llm")
+def stream_ollama(prompt, model="mistral", options=None, use_cache=True):
+    """Yield the answer as Ollama generates it (NDJSON chunks), e.g. for st.write_stream.
+
+    A cached answer is yielded in one piece; a fresh one is cached once Ollama reports done.
+    """
+    tracing.record(model=model)
+    if use_cache:
+        cached = llm_cache.get_response(model, prompt, options)
+        tracing.record(llm_cache="miss" if cached is None else "hit")
+        if cached is not None:
+            yield cached
+            return
+
+    payload = {"model": model, "prompt": prompt, "stream": True}
+    if options:
+        payload["options"] = options
+    parts = []
+    start = time.perf_counter()
+    with _generation_slot():
+        with get_session().post(
+            f"{OLLAMA_URL}/api/generate", json=payload, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    if not parts:
+                        tracing.record(first_token_s=round(time.perf_counter() - start, 3))
+                    parts.append(chunk["response"])
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    _record_usage(chunk)
+                    if use_cache:
+                        llm_cache.put_response(model, prompt, "".join(parts), options)
+                    break
@@ -0,0 +1,370 @@
+# common/tracing.py
+#
+# Lightweight per-turn tracing. Spans time a block (geocode, search, the Ollama call, ...)
+# and carry attributes such as candidate counts, cache hit flags and LLM token counts.
+# When the outermost span of a chat turn closes, the whole tree is logged as one JSON
+# line and folded into process-wide metrics, exposed in the Prometheus text format:
+#   - written to METRICS_PATH after every turn (default .cache/metrics.prom; "" disables)
+#   - served on http://METRICS_HOST:METRICS_PORT/metrics once the app's main.py calls
+#     start_metrics_server() with METRICS_PORT set (METRICS_HOST defaults to 127.0.0.1)
+# Streamlit sessions are threads of one process, so the metrics cover every session.
+
+import os
+import json
+import time
+import uuid
+import inspect
+import logging
+import threading
+import functools
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+METRICS_PATH = os.environ.get("METRICS_PATH", os.path.join(ROOT_DIR, ".cache", "metrics.prom"))
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+TRACE_LOG_LEVEL = os.environ.get("TRACE_LOG_LEVEL", "INFO")
+
+METRIC_PREFIX = "street_fairy"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RECENT_WINDOW = 1000      # durations per stage kept for the recent p50/p95/p99 gauges
+COUNTED_ATTRS = ("candidates", "results")
+
+logger = logging.getLogger("street_fairy.trace")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.propagate = False
+logger.setLevel(TRACE_LOG_LEVEL)
+
+_current = contextvars.ContextVar("street_fairy_span", default=None)
+_lock = threading.Lock()
+_stage_buckets = {}       # stage -> [count per bucket (+Inf last)]
+_stage_sums = {}          # stage -> (total seconds, count)
+_stage_recent = {}        # stage -> deque of recent durations in seconds
+_items = {}               # (stage, attr) -> (total, count)
+_cache_events = {}        # (cache, result) -> count
+_turns = {}               # (app, status) -> count
+_llm_tokens = {}          # (model, kind) -> count
+_llm_seconds = {}         # model -> generation seconds
+_gauges = {}              # prefix -> callable returning {name: number}
+_server = None
+
+
+# ------------------------
+# Spans
+# ------------------------
+@contextmanager
+def span(name, **attrs):
+    """Time the block as a span of the current turn; yields its attribute dict."""
+    parent = _current.get()
+    current = {"name": name, "attrs": dict(attrs), "spans": []}
+    token = _current.set(current)
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield current["attrs"]
+    except Exception as e:
+        # st.rerun()/st.stop() are BaseExceptions and leave the status ok
+        status = "error"
+        current["attrs"]["error"] = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        # Streams the block started but did not finish (e.g. st.rerun() mid-answer)
+        for iterator in list(current.get("open", [])):
+            iterator.close()
+        _finish(current, parent, time.perf_counter() - start, status)
+
+
+def _finish(current, parent, seconds, status):
+    current.pop("open", None)
+    current["seconds"] = seconds
+    current["status"] = status
+    _observe(current)
+    if parent is not None:
+        parent["spans"].append(current)
+    else:
+        _emit(current)
+
+
+class _TracedIterator:
+    """Iterator over a traced generator, timing only what runs inside it.
+
+    The span is current during each next() and nowhere else, so whatever the consumer
+    records between chunks (e.g. while st.write_stream renders them) stays on its own span.
+    """
+
+    def __init__(self, generator, name, attrs):
+        self._generator = generator
+        self._span = {"name": name, "attrs": dict(attrs), "spans": []}
+        self._parent = None
+        self._seconds = 0.0
+        self._started = False
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._done:
+            raise StopIteration
+        if not self._started:
+            self._started = True
+            self._parent = _current.get()
+            if self._parent is not None:
+                self._parent.setdefault("open", []).append(self)
+        token = _current.set(self._span)
+        start = time.perf_counter()
+        status = None
+        try:
+            return next(self._generator)
+        except StopIteration:
+            status = "ok"
+            raise
+        except Exception as e:
+            status = "error"
+            self._span["attrs"]["error"] = type(e).__name__
+            raise
+        finally:
+            self._seconds += time.perf_counter() - start
+            _current.reset(token)
+            if status is not None:
+                self._finish(status)
+
+    def close(self):
+        """Stop a stream that was not read to the end; its span is kept, marked abandoned."""
+        if self._done:
+            return
+        token = _current.set(self._span)
+        try:
+            self._generator.close()
+        finally:
+            _current.reset(token)
+        if self._started:
+            self._span["attrs"]["abandoned"] = True
+            self._finish("ok")
+        self._done = True
+
+    def __del__(self):
+        self.close()
+
+    def _finish(self, status):
+        self._done = True
+        if self._parent is not None and self in self._parent.get("open", []):
+            self._parent["open"].remove(self)
+        _finish(self._span, self._parent, self._seconds, status)
+
+
+def turn(app, **attrs):
+    """Root span of one chat turn, with a trace id to find it in the logs."""
+    return span("turn", app=app, trace_id=uuid.uuid4().hex[:16], **attrs)
+
+
+def record(**attrs):
+    """Set attributes on the innermost open span (a no-op outside any span)."""
+    current = _current.get()
+    if current is not None:
+        current["attrs"].update(attrs)
+
+
+def traced(name, **attrs):
+    """Decorator running every call of the function in a span.
+
+    For a generator function the span times the iterations (see _TracedIterator).
+    """
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                return _TracedIterator(fn(*args, **kwargs), name, attrs)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, **attrs):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _stage_totals(root):
+    # Milliseconds per stage name over the whole tree, for a quick look at a turn
+    totals = {}
+    stack = list(root["spans"])
+    while stack:
+        current = stack.pop()
+        totals[current["name"]] = round(totals.get(current["name"], 0.0) + current["seconds"] * 1000, 3)
+        stack.extend(current["spans"])
+    return totals
+
+
+def _as_record(current):
+    return {
+        "name": current["name"],
+        "ms": round(current["seconds"] * 1000, 3),
+        "status": current["status"],
+        **({"attrs": current["attrs"]} if current["attrs"] else {}),
+        **({"spans": [_as_record(child) for child in current["spans"]]} if current["spans"] else {}),
+    }
+
+
+def _emit(root):
+    if logger.isEnabledFor(logging.INFO):
+        entry = {"event": "trace", "ts": time.strftime("%Y-%m-%dT%H:%M:%S"), **_as_record(root)}
+        entry["stage_ms"] = _stage_totals(root)
+        logger.info(json.dumps(entry, default=str))
+    if METRICS_PATH:
+        try:
+            write_metrics(METRICS_PATH)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write metrics to {METRICS_PATH}: {e}")
+
+
+# ------------------------
+# Metrics
+# ------------------------
+def _observe(current):
+    name, attrs, seconds = current["name"], current["attrs"], current["seconds"]
+    with _lock:
+        buckets = _stage_buckets.setdefault(name, [0] * (len(DURATION_BUCKETS) + 1))
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                buckets[i] += 1
+        buckets[-1] += 1
+        total, count = _stage_sums.get(name, (0.0, 0))
+        _stage_sums[name] = (total + seconds, count + 1)
+        _stage_recent.setdefault(name, deque(maxlen=RECENT_WINDOW)).append(seconds)
+
+        for attr in COUNTED_ATTRS:
+            if isinstance(attrs.get(attr), (int, float)):
+                total, count = _items.get((name, attr), (0, 0))
+                _items[(name, attr)] = (total + attrs[attr], count + 1)
+        for attr, value in attrs.items():
+            # e.g. embedding_cache="disk", llm_cache="hit"
+            if attr.endswith("_cache") and isinstance(value, str):
+                key = (attr[:-len("_cache")], value)
+                _cache_events[key] = _cache_events.get(key, 0) + 1
+        if name == "turn":
+            key = (attrs.get("app", ""), current["status"])
+            _turns[key] = _turns.get(key, 0) + 1
+        if "model" in attrs and "completion_tokens" in attrs:
+            model = attrs["model"]
+            for kind in ("prompt", "completion"):
+                key = (model, kind)
+                _llm_tokens[key] = _llm_tokens.get(key, 0) + int(attrs.get(f"{kind}_tokens") or 0)
+            _llm_seconds[model] = _llm_seconds.get(model, 0.0) + float(attrs.get("generation_s") or 0.0)
+
+
+def register_gauges(prefix, fn):
+    """Export the numeric values of fn() (e.g. ollama.queue_metrics) as <prefix>_<key> gauges."""
+    with _lock:
+        _gauges[prefix] = fn
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _quantile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format."""
+    p = METRIC_PREFIX
+    lines = []
+    with _lock:
+        lines += [f"# HELP {p}_stage_seconds Wall time of each traced stage.", f"# TYPE {p}_stage_seconds histogram"]
+        for stage, buckets in sorted(_stage_buckets.items()):
+            for bound, count in zip(DURATION_BUCKETS, buckets):
+                lines.append(f"{p}_stage_seconds_bucket{_labels(stage=stage, le=bound)} {count}")
+            lines.append(f"{p}_stage_seconds_bucket{_labels(stage=stage, le='+Inf')} {buckets[-1]}")
+            total, count = _stage_sums[stage]
+            lines.append(f"{p}_stage_seconds_sum{_labels(stage=stage)} {total:.6f}")
+            lines.append(f"{p}_stage_seconds_count{_labels(stage=stage)} {count}")
+
+        lines += [f"# HELP {p}_stage_recent_seconds Quantiles of each stage's last {RECENT_WINDOW} durations.",
+                  f"# TYPE {p}_stage_recent_seconds gauge"]
+        for stage, recent in sorted(_stage_recent.items()):
+            for q in (0.5, 0.95, 0.99):
+                lines.append(f"{p}_stage_recent_seconds{_labels(stage=stage, quantile=q)} {_quantile(recent, q):.6f}")
+
+        lines += [f"# HELP {p}_stage_items Candidate and result counts per stage.", f"# TYPE {p}_stage_items summary"]
+        for (stage, attr), (total, count) in sorted(_items.items()):
+            lines.append(f"{p}_stage_items_sum{_labels(stage=stage, kind=attr)} {total}")
+            lines.append(f"{p}_stage_items_count{_labels(stage=stage, kind=attr)} {count}")
+
+        lines += [f"# HELP {p}_cache_events_total Cache lookups by cache and result.", f"# TYPE {p}_cache_events_total counter"]
+        for (cache, result), count in sorted(_cache_events.items()):
+            lines.append(f"{p}_cache_events_total{_labels(cache=cache, result=result)} {count}")
+
+        lines += [f"# HELP {p}_turns_total Chat turns by app and status.", f"# TYPE {p}_turns_total counter"]
+        for (app, status), count in sorted(_turns.items()):
+            lines.append(f"{p}_turns_total{_labels(app=app, status=status)} {count}")
+
+        lines += [f"# HELP {p}_llm_tokens_total Tokens processed by Ollama.", f"# TYPE {p}_llm_tokens_total counter"]
+        for (model, kind), count in sorted(_llm_tokens.items()):
+            lines.append(f"{p}_llm_tokens_total{_labels(model=model, kind=kind)} {count}")
+        lines += [f"# HELP {p}_llm_generation_seconds_total Ollama generation time (tokens/sec = tokens / seconds).",
+                  f"# TYPE {p}_llm_generation_seconds_total counter"]
+        for model, seconds in sorted(_llm_seconds.items()):
+            lines.append(f"{p}_llm_generation_seconds_total{_labels(model=model)} {seconds:.6f}")
+
+        gauges = dict(_gauges)
+    for prefix, fn in sorted(gauges.items()):
+        try:
+            values = fn()
+        except Exception:
+            continue
+        for key, value in sorted(values.items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines += [f"# TYPE {p}_{prefix}_{key} gauge", f"{p}_{prefix}_{key} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path=METRICS_PATH):
+    # Write-then-rename so a scraper never reads a half written file
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_metrics())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serve /metrics on a daemon thread when port is set. Started once per process; later calls are no-ops."""
+    global _server
+    with _lock:
+        if _server is None and port:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                logger.warning(f"⚠️ Metrics endpoint not started on {host}:{port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
@@ -1,33 +1,25 @@
-import snowflake.connector
-import pandas as pd
-import numpy as np
 import json
-
-conn= snowflake.connector.connect(
-    user='BOA',
-    password='',
-    account='',
-    warehouse='ANIMAL_TASK_WH',
-    database='STREET_FAIRY',
-    schema='PUBLIC'
+import os
+import subprocess
+
+# Filtered_Attributes comes from the dbt model "DBT Models/models/Filtered_Attribute_Model.sql"
+# (OBJECT_AGG per business, computed in the warehouse), so this script and dbt cannot
+# drift apart. The model MERGEs into PUBLIC.Filtered_Attributes by business_id.
+# Credentials: SNOWFLAKE_USER / SNOWFLAKE_PASSWORD (see "DBT Models/profiles.yml").
+DBT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "DBT Models")
+MODEL = "Filtered_Attribute_Model"
+
+subprocess.run(
+    ["dbt", "run", "--select", MODEL, "--project-dir", DBT_DIR, "--profiles-dir", DBT_DIR],
+    check=True,
 )
 
-cur = conn.cursor()
-
-query=r"select  * from final_attribute_model where( upper(attribute_value) not like '%FALSE%' and upper(attribute_value)<>'NONE' and upper(attribute_value)<>'NO' and attribute_value<>'{}'  AND LOWER(attribute_name) NOT LIKE '%restaurantspricerange%')"
-
-df = pd.read_sql(query, conn)
-
-df_aggregated = df.groupby("BUSINESS_ID").apply(
-    lambda x: dict(zip(x["ATTRIBUTE_NAME"], x["ATTRIBUTE_VALUE"]))
-).reset_index(name="ATTRIBUTES")
-
-data_tuples = [(row["BUSINESS_ID"], json.dumps(row["ATTRIBUTES"])) for _, row in df_aggregated.iterrows()]
-
-query1=r"INSERT INTO PUBLIC.Filtered_Attributes (BUSINESS_ID, ATTRIBUTES) VALUES (%s, %s)"
-
-cur.executemany(query1, data_tuples)
-conn.commit()
-cur.close() 
-conn.close()
-
+# dbt exits 0 when the selector matches nothing, so check what actually ran
+with open(os.path.join(DBT_DIR, "target", "run_results.json")) as f:
+    results = json.load(f)["results"]
+if not any(r["unique_id"].endswith(f".{MODEL}") for r in results):
+    raise RuntimeError(f"❌ dbt did not run {MODEL}; check model-paths in dbt_project.yml")
+failed = [r["unique_id"] for r in results if r["status"] != "success"]
+if failed:
+    raise RuntimeError(f"❌ dbt run did not succeed for: {', '.join(failed)}")
+print("✅ Filtered_Attributes merged")
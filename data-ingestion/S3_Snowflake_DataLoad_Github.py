@@ -13,14 +13,25 @@ conn= snowflake.connector.connect(
 
 
 
-table_name='Business_test'
+# The table the dbt models read; sql_scripts/S3_Snowflake.sql adds its updated_at column
+table_name='Business'
+STAGE_TABLE = f"{table_name}_load"
 
+# Columns of the CSV, in file order; updated_at is set here, not loaded
+COLUMNS = [
+    "ID", "business_id", "name", "address", "city", "state", "postal_code", "latitude", "longitude",
+    "stars", "review_count", "is_open", "attributes", "categories", "hours",
+]
 
 
 cur=conn.cursor()
 
-query = """
-COPY INTO Business_test
+# COPY INTO a temporary copy of the table, then MERGE: new and changed businesses get
+# updated_at = CURRENT_TIMESTAMP(), which is how the incremental dbt models find them
+cur.execute(f"CREATE OR REPLACE TEMPORARY TABLE {STAGE_TABLE} LIKE {table_name}")
+
+query = f"""
+COPY INTO {STAGE_TABLE} ({", ".join(COLUMNS)})
     FROM @my_s3_stage_Business_test/top5_states_businesses.csv
     FILE_FORMAT = (
         TYPE = 'CSV'
@@ -33,6 +44,20 @@ COPY INTO Business_test
 
 cur.execute(query)
 
+data_columns = [c for c in COLUMNS if c != "business_id"]
+updates = ", ".join(f"t.{c} = s.{c}" for c in data_columns)
+changed = " OR ".join(f"t.{c} IS DISTINCT FROM s.{c}" for c in data_columns)
+cur.execute(f"""
+    MERGE INTO {table_name} t
+    USING {STAGE_TABLE} s
+    ON t.business_id = s.business_id
+    WHEN MATCHED AND ({changed}) THEN UPDATE SET {updates}, t.updated_at = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN INSERT ({", ".join(COLUMNS)}, updated_at)
+        VALUES ({", ".join(f"s.{c}" for c in COLUMNS)}, CURRENT_TIMESTAMP())
+""")
+inserted, updated = cur.fetchone()
+print(f"✅ {table_name}: {inserted} businesses inserted, {updated} updated")
+
 conn.commit()
 
 cur.close()
@@ -0,0 +1,231 @@
+import os
+import json
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# ------------------------
+# Document builder shared by LLM/Embeddings_Snowflake.py and ingest_business_kb.py.
+# The ATTRIBUTES / HOURS JSON of a whole batch is parsed in one json.loads call and
+# flattened into (row, pair code) lines. A table has millions of lines but only a
+# few hundred distinct (key, value) pairs, so each pair's text is rendered once with
+# pandas string operations, broadcast back to its lines by code and joined per
+# business, instead of formatting every key of every row in a Python loop.
+# ------------------------
+
+
+def parse_json_column(values):
+    """One dict per value (JSON text or dict); {} for nulls, invalid JSON and non-objects."""
+    values = values.tolist() if isinstance(values, pd.Series) else list(values)
+    texts = [v if isinstance(v, str) and v.strip() else "null" for v in values]
+    try:
+        parsed = json.loads("[" + ",".join(texts) + "]")
+        if len(parsed) != len(texts):
+            raise ValueError("row count changed")
+    except ValueError:
+        # Some value is not valid JSON: fall back to parsing row by row
+        parsed = []
+        for text in texts:
+            try:
+                parsed.append(json.loads(text))
+            except ValueError:
+                parsed.append(None)
+    return [
+        v if isinstance(v, dict) else (p if isinstance(p, dict) else {})
+        for v, p in zip(values, parsed)
+    ]
+
+
+def to_long(dicts):
+    """Every key of every dict as parallel line arrays, with its (key, value) pair factorized.
+
+    Returns (rows, codes, pairs): the row position and pair code of each line, and a
+    DataFrame of the distinct pairs (key, value) that the codes index into.
+    """
+    lengths = np.fromiter((len(d) for d in dicts), dtype=np.int64, count=len(dicts))
+    rows = np.repeat(np.arange(len(dicts)), lengths)
+    keys = pd.Series([k for d in dicts for k in d], dtype=object).to_numpy()
+    values = pd.Series([v for d in dicts for v in d.values()], dtype=object).to_numpy()
+
+    key_codes, _ = pd.factorize(keys)
+    try:
+        value_codes, value_uniques = pd.factorize(values, use_na_sentinel=False)
+        if any(isinstance(u, (int, float)) for u in value_uniques):
+            # True, 1 and 1.0 hash alike: keep the value's type in the pair to tell them apart
+            type_codes, types = pd.factorize(pd.Series([v.__class__ for v in values], dtype=object).to_numpy())
+            value_codes = value_codes * len(types) + type_codes
+    except TypeError:
+        # Nested (unhashable) values: identify them by repr instead
+        value_codes, _ = pd.factorize(pd.Series([repr(v) for v in values], dtype=object).to_numpy())
+
+    n_values = int(value_codes.max()) + 1 if len(values) else 1
+    codes, uniques = pd.factorize(key_codes * n_values + value_codes)
+    # First line of every pair (writing in reverse, the earliest line wins)
+    first = np.empty(len(uniques), dtype=np.int64)
+    first[codes[::-1]] = np.arange(len(codes))[::-1]
+    pairs = pd.DataFrame({"key": keys[first], "value": values[first]}, dtype=object)
+    return rows, codes, pairs
+
+
+def join_by_row(rows, pieces, n_rows, sep):
+    """Join each row's pieces of text (in key order) with sep; "" for rows without any."""
+    # Lines are sorted by row, so every row's pieces are one contiguous slice
+    bounds = np.searchsorted(rows, np.arange(n_rows + 1))
+    pieces = pieces.tolist()
+    return np.array([sep.join(pieces[start:end]) for start, end in zip(bounds[:-1], bounds[1:])], dtype=object)
+
+
+def cast_values(values):
+    """Vectorized try_cast_value: quoted/boolean/numeric strings become bool, int or float."""
+    out = pd.Series(values, dtype=object).copy()
+    is_str = out.map(type).eq(str).to_numpy()
+    if not is_str.any():
+        return out
+
+    s = out[is_str].str.strip('"').str.strip("'")
+    lower = s.str.lower()
+    is_bool = lower.isin(["true", "false"]).to_numpy()
+    is_int = ~is_bool & s.str.isdigit().to_numpy()
+    as_float = pd.to_numeric(s.where(~is_bool & ~is_int), errors="coerce").to_numpy(dtype=float)
+    is_float = ~np.isnan(as_float)
+
+    # Filled through an object array, so pandas never re-infers a numeric dtype (e.g. uint64
+    # or float64 for a big int) that would turn the Python ints into floats
+    cast = np.array(s, dtype=object)
+    cast[is_bool] = lower[is_bool].eq("true").to_numpy()
+    # Up to 18 digits always fits int64; longer digit strings go through Python's int like before
+    fits = is_int & s.str.len().le(18).to_numpy()
+    cast[fits] = s[fits].astype(np.int64).to_numpy()
+    long = is_int & ~fits
+    cast[long] = np.fromiter((int(v) for v in s[long]), dtype=object, count=int(long.sum()))
+    cast[is_float] = as_float[is_float]
+
+    result = np.array(out, dtype=object)
+    result[is_str] = cast
+    return pd.Series(result, index=out.index, dtype=object)
+
+
+# ------------------------
+# LLM/Embeddings_Snowflake.py: descriptive sentences per business
+# ------------------------
+
+def attributes_text(dicts):
+    """'Ambience is casual. Has garage parking. WiFi is free' per dict."""
+    rows, codes, pairs = to_long(dicts)
+    key = pairs["key"].map(str)
+    value = pairs["value"].map(str)
+    lower = value.str.lower()
+    spaced = key.str.replace("_", " ", regex=False)
+    suffix = key.str.rsplit("_", n=1).str[-1]
+    yes = lower.isin(["true", "yes"])
+
+    text = spaced + " is " + value
+    text[yes] = spaced[yes] + " available"
+    parking = yes & key.str.contains("BusinessParking", regex=False)
+    text[parking] = "Has " + suffix[parking] + " parking"
+    ambience = yes & key.str.contains("Ambience_", regex=False)
+    text[ambience] = "Ambience is " + suffix[ambience]
+
+    keep = (pairs["value"].notna() & ~lower.isin(["false", "no", "null"])).to_numpy(dtype=bool)[codes]
+    return join_by_row(rows[keep], text.to_numpy(dtype=object)[codes[keep]], len(dicts), ". ")
+
+
+def hours_text(dicts):
+    """'Open on Monday from 8:00-17:00' per dict, skipping closed (0:0-0:0) days."""
+    rows, codes, pairs = to_long(dicts)
+    time = pairs["value"].map(str)
+    text = "Open on " + pairs["key"].map(str) + " from " + time.str.replace(":0", ":00", regex=False)
+    keep = (time != "0:0-0:0").to_numpy(dtype=bool)[codes]
+    return join_by_row(rows[keep], text.to_numpy(dtype=object)[codes[keep]], len(dicts), ". ")
+
+
+def embedding_texts(df):
+    """FLATTENED_ATTRIBUTES and HOURS text for a frame with ATTRIBUTES and HOURS JSON columns."""
+    return pd.DataFrame({
+        "FLATTENED_ATTRIBUTES": attributes_text(parse_json_column(df["ATTRIBUTES"])),
+        "HOURS": hours_text(parse_json_column(df["HOURS"])),
+    }, index=df.index)
+
+
+def build_parallel(fn, df, processes=None, chunk_size=20000):
+    """fn(df) over row chunks of df on a process pool, concatenated back in order.
+
+    Runs in-process for small frames, and where fork is unavailable (workers would
+    re-import the calling script instead of inheriting it).
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(df) <= chunk_size or "fork" not in mp.get_all_start_methods():
+        return fn(df)
+    chunks = [df.iloc[i:i + chunk_size] for i in range(0, len(df), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(processes, len(chunks)), mp_context=mp.get_context("fork")) as pool:
+        return pd.concat(pool.map(fn, chunks))
+
+
+# ------------------------
+# ingest_business_kb.py: Chroma documents and metadata
+# ------------------------
+
+def _column(df, name, default=None, fill_empty=False):
+    if name not in df:
+        return pd.Series([default] * len(df), index=df.index, dtype=object)
+    values = df[name]
+    if fill_empty:
+        values = values.where(values.notna() & (values != ""), default)
+    return values
+
+
+def business_records(rows):
+    """(business_id, document, metadata) for each ENGINEERED_BUSINESSES row dict."""
+    df = pd.DataFrame(rows, dtype=object)
+    n_rows = len(df)
+    if n_rows == 0:
+        return []
+
+    name = _column(df, "NAME", "Unknown Business", fill_empty=True).map(str)
+    address = _column(df, "ADDRESS", "", fill_empty=True).map(str)
+    city = _column(df, "CITY", "", fill_empty=True)
+    state = _column(df, "STATE", "", fill_empty=True)
+    postal_code = _column(df, "POSTAL_CODE", "", fill_empty=True).map(str)
+    categories = _column(df, "CATEGORIES", "", fill_empty=True)
+    stars = cast_values(_column(df, "STARS", 0))
+    reviews = cast_values(_column(df, "REVIEW_COUNT", 0))
+    lat = cast_values(_column(df, "LATITUDE"))
+    lon = cast_values(_column(df, "LONGITUDE"))
+
+    # Attributes: cast and render each distinct (key, value) pair once (JSON nulls dropped)
+    attr_rows, codes, pairs = to_long(parse_json_column(_column(df, "ATTRIBUTES")))
+    present = pairs["value"].notna().to_numpy(dtype=bool)[codes]
+    attr_rows, codes = attr_rows[present], codes[present]
+    pair_keys = pairs["key"].to_numpy(dtype=object)
+    pair_values = cast_values(pairs["value"]).to_numpy(dtype=object)
+    pair_text = (pairs["key"].map(str) + "=" + pd.Series(pair_values, dtype=object).map(str)).to_numpy(dtype=object)
+    attr_text = join_by_row(attr_rows, pair_text[codes], n_rows, ", ")
+
+    hour_rows, hour_codes, hour_pairs = to_long(parse_json_column(_column(df, "HOURS")))
+    hour_text = (hour_pairs["key"].map(str) + ": " + hour_pairs["value"].map(str)).to_numpy(dtype=object)
+    hours_joined = join_by_row(hour_rows, hour_text[hour_codes], n_rows, ", ")
+
+    docs = (
+        "Business Name: " + name
+        + "\nAddress: " + address + ", " + city.map(str) + ", " + state.map(str) + " " + postal_code
+        + "\nCategories: " + categories.map(str)
+        + "\nRating: " + stars.map(str) + " stars (" + reviews.map(str) + " reviews)"
+        + "\nAttributes: " + attr_text
+        + "\nHours: " + hours_joined
+        + "\n"
+    )
+
+    fields = ["name", "city", "state", "stars", "review_count", "latitude", "longitude", "categories"]
+    columns = [name, city, state, stars, reviews, lat, lon, categories]
+    metadatas = [dict(zip(fields, values)) for values in zip(*(c.tolist() for c in columns))]
+
+    # Flat attributes go into the metadata too (only primitives allowed)
+    primitive = np.array([isinstance(v, (str, int, float, bool)) for v in pair_values], dtype=bool)[codes]
+    meta_rows, meta_codes = attr_rows[primitive], codes[primitive]
+    meta_keys, meta_values = pair_keys[meta_codes].tolist(), pair_values[meta_codes].tolist()
+    bounds = np.searchsorted(meta_rows, np.arange(n_rows + 1))
+    for meta, start, end in zip(metadatas, bounds[:-1].tolist(), bounds[1:].tolist()):
+        meta.update(zip(meta_keys[start:end], meta_values[start:end]))
+
+    return list(zip(df["BUSINESS_ID"], docs, metadatas))
@@ -4,7 +4,9 @@ import snowflake.snowpark as snowpark
 from snowflake.snowpark.functions import col
 import chromadb
 from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
-from tqdm import tqdm
+from pipeline import run_pipeline, embedding_pool, content_hash, load_content_hashes, delete_missing
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 
 # STEP 1: CONNECT TO SNOWFLAKE
 def get_snowpark_session():
@@ -17,7 +19,8 @@ def fetch_merged_kb(session):
     category_df = session.table("FILTERED_CATEGORIES").select("BUSINESS_ID", "CATEGORIES")
     attr_df = session.table("EXTRACTED_ATTRIBUTES").select("BUSINESS_ID", "ATTRIBUTES")
     merged = category_df.join(attr_df, on="BUSINESS_ID")
-    return merged.collect()
+    # Rows stream in as they are fetched instead of being collected up front
+    return merged.to_local_iterator()
 
 # STEP 3: FORMAT FOR CHROMA (incl. attributes as JSON string)
 def format_for_chroma(row):
@@ -64,49 +67,62 @@ def try_cast_value(value):
             return v
     return value
 
-# STEP 4: INGEST TO CHROMA
-def ingest_to_chroma(formatted_docs, batch_size=1000):
+# STEP 4: STREAM INTO CHROMA (see pipeline.py)
+def ingest_to_chroma(rows, batch_size=1000, processes=None):
     chroma_client = chromadb.PersistentClient(path=".chroma")
-    embedding_fn = SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+    embedding_fn = SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL)
     collection = chroma_client.get_or_create_collection("street_fairy_kb", embedding_function=embedding_fn)
 
-    total = len(formatted_docs)
-    print(f"📦 Starting ingestion of {total} records into ChromaDB...")
+    # Only new or changed records get embedded and upserted
+    existing = load_content_hashes(collection)
+    counts = {"new": 0, "changed": 0, "unchanged": 0}
+
+    # ✅ Deduplicate BUSINESS_IDs as rows arrive
+    seen_ids = set()
+
+    def prepare(batch):
+        formatted = []
+        for row in batch:
+            biz_id, doc, cat, attr_text, attr_dict = format_for_chroma(row)
+            if biz_id in seen_ids:
+                continue
+            seen_ids.add(biz_id)
 
-    for i in tqdm(range(0, total, batch_size), desc="🔄 Ingesting"):
-        batch = formatted_docs[i:i + batch_size]
-        ids = [biz_id for biz_id, doc, cat, attr_text, attr_dict in batch]
-        docs = [doc for biz_id, doc, cat, attr_text, attr_dict in batch]
-        metas = []
-        for biz_id, doc, cat, attr_text, attr_dict in batch:
             meta = {
                 "categories": cat,
                 "attribute_text": attr_text,
             }
             meta.update(attr_dict)  # ✅ Flatten all keys from attr_dict into metadata
-            metas.append(meta)
-
-
-        collection.add(
-            documents=docs,
-            ids=ids,
-            metadatas=metas
+            meta["content_hash"] = content_hash(doc, meta, EMBEDDING_MODEL)
+            if biz_id not in existing:
+                counts["new"] += 1
+            elif existing[biz_id] != meta["content_hash"]:
+                counts["changed"] += 1
+            else:
+                counts["unchanged"] += 1
+                continue
+            formatted.append((biz_id, doc, meta))
+        return formatted
+
+    def write(batch, embeddings):
+        collection.upsert(
+            documents=[doc for biz_id, doc, meta in batch],
+            embeddings=embeddings.tolist(),
+            ids=[biz_id for biz_id, doc, meta in batch],
+            metadatas=[meta for biz_id, doc, meta in batch]
         )
 
-    print(f"✅ Finished ingesting {total} records into ChromaDB!")
+    print(f"📦 Streaming records into ChromaDB ({len(existing)} already stored)...")
+    with embedding_pool(EMBEDDING_MODEL, processes) as encode:
+        run_pipeline(rows, prepare, lambda batch: encode([doc for biz_id, doc, meta in batch]), write, batch_size)
+
+    deleted = delete_missing(collection, existing, seen_ids)
+    print(
+        f"✅ Finished: {counts['new']} new, {counts['changed']} changed, "
+        f"{counts['unchanged']} unchanged, {deleted} deleted records in ChromaDB!"
+    )
 
 # ENTRY POINT
 if __name__ == "__main__":
     session = get_snowpark_session()
-    raw_rows = fetch_merged_kb(session)
-    formatted = [format_for_chroma(row) for row in raw_rows]
-
-    # ✅ Deduplicate BUSINESS_IDs
-    seen_ids = set()
-    deduped_formatted = []
-    for biz_id, doc, cat, attr_text, attr_dict in formatted:
-        if biz_id not in seen_ids:
-            seen_ids.add(biz_id)
-            deduped_formatted.append((biz_id, doc, cat, attr_text, attr_dict))
-
-    ingest_to_chroma(deduped_formatted)
\ No newline at end of file
+    ingest_to_chroma(fetch_merged_kb(session))
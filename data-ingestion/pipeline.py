@@ -0,0 +1,174 @@
+import os
+import json
+import queue
+import hashlib
+import threading
+from contextlib import contextmanager
+from sentence_transformers import SentenceTransformer
+from tqdm import tqdm
+
+# ------------------------
+# Streaming ingestion pipeline shared by ingest_business_kb.py and ingest_kb.py:
+#   fetch rows -> format + dedupe -> embed -> write
+# Each stage runs in its own thread and hands batches on through a bounded queue,
+# so the stages overlap and at most a few batches are in memory at any time.
+# ------------------------
+
+_DONE = object()
+
+
+def _put(q, item, stop):
+    # Blocks while the next stage is busy, but gives up once the pipeline is stopping
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def run_pipeline(rows, prepare, encode, write, batch_size=1000, max_pending=4):
+    """Stream rows through prepare(batch) -> encode(batch) -> write(batch, embeddings).
+
+    rows can be any iterator (e.g. DataFrame.to_local_iterator()); prepare returns the
+    batch's formatted, deduplicated records (possibly fewer, possibly none), encode
+    returns one embedding per record. Returns the number of records written.
+    """
+    stop = threading.Event()
+    errors = []
+    to_prepare = queue.Queue(maxsize=max_pending)
+    to_encode = queue.Queue(maxsize=max_pending)
+    to_write = queue.Queue(maxsize=max_pending)
+
+    def fetch():
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                if not _put(to_prepare, batch, stop):
+                    return
+                batch = []
+        if batch:
+            _put(to_prepare, batch, stop)
+
+    def stage(source, target, fn):
+        while True:
+            batch = _get(source, stop)
+            if batch is _DONE:
+                return
+            records = fn(batch)
+            if records and not _put(target, records, stop):
+                return
+
+    def encode_batch(records):
+        return records, encode(records)
+
+    def worker(fn, *args, target):
+        try:
+            fn(*args)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(target, _DONE, stop)
+
+    threads = [
+        threading.Thread(target=worker, args=(fetch,), kwargs={"target": to_prepare}, daemon=True),
+        threading.Thread(target=worker, args=(stage, to_prepare, to_encode, prepare), kwargs={"target": to_encode}, daemon=True),
+        threading.Thread(target=worker, args=(stage, to_encode, to_write, encode_batch), kwargs={"target": to_write}, daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    written = 0
+    with tqdm(desc="🔄 Ingesting", unit="docs") as progress:
+        try:
+            while True:
+                item = _get(to_write, stop)
+                if item is _DONE:
+                    break
+                records, embeddings = item
+                write(records, embeddings)
+                written += len(records)
+                progress.update(len(records))
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return written
+
+
+@contextmanager
+def embedding_pool(model_name, processes=None, batch_size=128):
+    """Yield encode(texts) -> embeddings, backed by one SentenceTransformer worker process per CPU core."""
+    model = SentenceTransformer(model_name)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        yield lambda texts: model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        return
+
+    # One torch thread per worker, otherwise every worker spins up a thread per core
+    previous = os.environ.get("OMP_NUM_THREADS")
+    os.environ["OMP_NUM_THREADS"] = "1"
+    try:
+        pool = model.start_multi_process_pool(target_devices=["cpu"] * processes)
+    finally:
+        if previous is None:
+            os.environ.pop("OMP_NUM_THREADS")
+        else:
+            os.environ["OMP_NUM_THREADS"] = previous
+
+    try:
+        print(f"🧠 Embedding on {processes} processes")
+        yield lambda texts: model.encode_multi_process(texts, pool, batch_size=batch_size)
+    finally:
+        model.stop_multi_process_pool(pool)
+
+
+# ------------------------
+# Incremental upserts: each record's metadata carries a hash of its document,
+# metadata and embedding model, so a rerun only embeds and upserts records that are
+# new or changed (or were embedded with another model), and deletes the ones that
+# no longer come out of Snowflake.
+# ------------------------
+
+def content_hash(doc, meta, model_name):
+    payload = json.dumps({"document": doc, "metadata": meta, "model": model_name}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_content_hashes(collection, page_size=10000):
+    """{id: content_hash} of everything already in the collection."""
+    hashes = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        for record_id, meta in zip(page["ids"], page["metadatas"]):
+            hashes[record_id] = (meta or {}).get("content_hash")
+        offset += len(page["ids"])
+    return hashes
+
+
+def delete_missing(collection, existing_ids, seen_ids, batch_size=1000):
+    """Delete records that were in the collection but not in this run. Returns how many."""
+    gone = [record_id for record_id in existing_ids if record_id not in seen_ids]
+    for i in range(0, len(gone), batch_size):
+        collection.delete(ids=gone[i:i + batch_size])
+    return len(gone)
@@ -33,8 +33,9 @@ CREATE TABLE Business_test (
 
 SELECT CURRENT_DATABASE(), CURRENT_SCHEMA();
 
-
-
-
-
-
+--CHANGE TRACKING FOR THE INCREMENTAL DBT MODELS
+-- data-ingestion/S3_Snowflake_DataLoad_Github.py MERGEs each load and sets updated_at =
+-- CURRENT_TIMESTAMP() on inserted or changed rows; dbt only reprocesses businesses newer
+-- than what each model already holds, plus any row a different load left NULL
+ALTER TABLE Business ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP_LTZ;
+UPDATE Business SET updated_at = CURRENT_TIMESTAMP() WHERE updated_at IS NULL;
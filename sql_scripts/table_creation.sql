@@ -65,4 +65,12 @@ JOIN EXTRACTED_ATTRIBUTES AS fa on fb.business_id = fa.business_id
 SELECT
 COUNT(*)
 FROM engineered_businesses;
-show tables;
\ No newline at end of file
+show tables;
+
+-- Lets the chatbot snapshot sync (utils/snapshot.py) read only rows changed since its last sync
+ALTER TABLE BUSINESS_EMBEDDINGS SET CHANGE_TRACKING = TRUE;
+
+-- Embeddings as packed little-endian float32 (384 x 4 bytes) so loaders decode them with
+-- np.frombuffer instead of running PARSE_JSON over every row. LLM/Embeddings_Snowflake.py
+-- fills it; its MERGE backfills every existing row on the first run after this change.
+ALTER TABLE BUSINESS_EMBEDDINGS ADD COLUMN IF NOT EXISTS EMBEDDING_F32 BINARY(1536);
@@ -0,0 +1,14 @@
+# tests/conftest.py
+#
+# Run from the repository root:  python -m pytest -q
+# Both chatbots import their modules as `utils`; these tests cover the FAISS app's
+# (plus the shared common/ package), so its folder goes on sys.path, as does
+# data-ingestion/ for its flat modules.
+
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "Chatbot - FAISS_Implement"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "data-ingestion"))
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from document_builder import cast_values, attributes_text, hours_text, parse_json_column
+
+
+def try_cast_value(value):
+    # The per-value cast cast_values replaces (data-ingestion/ingest_kb.py)
+    if isinstance(value, str):
+        v = value.strip('"').strip("'")
+        if v.lower() == "true":
+            return True
+        elif v.lower() == "false":
+            return False
+        elif v.isdigit():
+            return int(v)
+        try:
+            return float(v)
+        except ValueError:
+            return v
+    return value
+
+
+VALUES = [
+    "True", "'false'", '"free"', "u'free'", "42", "'5'", "3.5", "-5", "1e3", "", "None",
+    "1234567890123456789", "12345678901234567890", "99999999999999999999999",
+    None, 7, 2.5, True, {"garage": False},
+]
+
+
+def test_matches_the_per_value_cast():
+    cast = cast_values(VALUES).tolist()
+    expected = [try_cast_value(v) for v in VALUES]
+    assert cast == expected
+    assert [type(v) for v in cast] == [type(v) for v in expected]
+
+
+@pytest.mark.parametrize("digits", ["1234567890123456789", "12345678901234567890"])
+def test_long_digit_strings_stay_exact_ints_next_to_text(digits):
+    cast = cast_values([digits, "x", "full_bar", "3"]).tolist()
+    assert cast == [int(digits), "x", "full_bar", 3]
+    assert type(cast[0]) is int
+
+
+def test_only_numeric_strings():
+    # No text next to the numbers, so pandas would infer a numeric dtype
+    assert cast_values(["12345678901234567890", "-5"]).tolist() == [12345678901234567890, -5.0]
+    assert type(cast_values(["-5"])[0]) is float
+
+
+def test_keeps_the_index():
+    cast = cast_values(pd.Series(["1", "x"], index=[5, 9]))
+    assert list(cast.index) == [5, 9]
+
+
+def test_attributes_and_hours_text():
+    attributes = parse_json_column([
+        '{"WiFi": "free", "BikeParking": "True", "BusinessParking_garage": "True", "HasTV": "False"}',
+        "not json",
+        None,
+    ])
+    hours = parse_json_column(['{"Monday": "8:0-17:0", "Sunday": "0:0-0:0"}', "{}", None])
+
+    assert attributes_text(attributes).tolist() == [
+        "WiFi is free. BikeParking available. Has garage parking", "", "",
+    ]
+    assert hours_text(hours).tolist() == ["Open on Monday from 8:00-17:00", "", ""]
@@ -0,0 +1,72 @@
+import itertools
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+from common import embeddings  # noqa: E402
+
+
+class CountingModel:
+    """Stands in for the SentenceTransformer: a fixed vector per text, and a count of encodes."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.encoded.extend(texts)
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    model = CountingModel()
+    store = embeddings.load_embedding_store(str(tmp_path / "query_embeddings.sqlite"))
+    clock = itertools.count(1)
+    monkeypatch.setattr(embeddings, "load_embedding_model", lambda model_name: model)
+    monkeypatch.setattr(embeddings, "load_embedding_store", lambda: store)
+    monkeypatch.setattr(embeddings.time, "time", lambda: float(next(clock)))
+    embeddings._cached_vector.cache_clear()
+    yield model
+    embeddings._cached_vector.cache_clear()
+
+
+def test_normalize_query():
+    assert embeddings.normalize_query("  Tacos \n in   TAMPA ") == "tacos in tampa"
+
+
+def test_equivalent_queries_encode_once(model):
+    first = embeddings.encode_query("Tacos in Tampa", "m")
+    again = embeddings.encode_query("  tacos IN tampa", "m")
+
+    assert first.shape == (1, 3) and first.dtype == np.float32
+    assert np.array_equal(first, again)
+    assert model.encoded == ["tacos in tampa"]
+    # Callers get their own copy of the cached vector
+    again[0, 0] = -1
+    assert embeddings.encode_query("tacos in tampa", "m")[0, 0] == first[0, 0]
+
+
+def test_disk_tier_survives_a_new_process(model):
+    vector = embeddings.encode_query("sushi", "m")
+    embeddings._cached_vector.cache_clear()  # as if the process restarted
+
+    assert np.array_equal(embeddings.encode_query("sushi", "m"), vector)
+    assert model.encoded == ["sushi"]
+
+
+def test_models_do_not_share_vectors(model):
+    embeddings.encode_query("sushi", "model-a")
+    embeddings.encode_query("sushi", "model-b")
+    assert model.encoded == ["sushi", "sushi"]
+
+
+def test_disk_tier_drops_the_least_recently_used(model, monkeypatch):
+    monkeypatch.setattr(embeddings, "DISK_CACHE_SIZE", 2)
+    embeddings.encode_query("a", "m")
+    embeddings.encode_query("b", "m")
+    embeddings._cached_vector.cache_clear()
+    embeddings.encode_query("a", "m")  # read back from disk, so "b" is now the oldest
+    embeddings.encode_query("c", "m")
+
+    stored = {q for (q,) in embeddings.load_embedding_store().execute("SELECT query FROM query_embeddings")}
+    assert stored == {"a", "c"}
@@ -0,0 +1,67 @@
+import numpy as np
+from geopy.distance import geodesic
+
+from common.geo import haversine_km, geodesic_km, within_radius, build_geo_index, radius_query
+
+# Philadelphia City Hall
+LAT, LON = 39.9526, -75.1652
+
+
+def _ring(distances_km, bearing_deg=45.0):
+    """Points at the given geodesic distances from (LAT, LON)."""
+    points = [geodesic(kilometers=d).destination((LAT, LON), bearing_deg) for d in distances_km]
+    return np.array([p.latitude for p in points]), np.array([p.longitude for p in points])
+
+
+def test_haversine_is_within_the_error_margin_of_geodesic():
+    lats, lons = _ring([0.5, 2.0, 4.9, 5.0, 20.0])
+    haversine = haversine_km(LAT, LON, lats, lons)
+    geodesic_ = geodesic_km(LAT, LON, lats, lons)
+    assert np.allclose(haversine, geodesic_, rtol=0.005)
+    assert haversine_km(LAT, LON, [LAT], [LON])[0] == 0.0
+
+
+def test_within_radius_exact_settles_the_edge_with_geodesic():
+    # East of Philadelphia haversine comes out ~0.25% short, so 5.01 km reads as < 5 km
+    lats, lons = _ring([1.0, 4.99, 5.01, 6.0], bearing_deg=90.0)
+    assert haversine_km(LAT, LON, lats, lons)[2] < 5.0
+
+    in_radius, distances = within_radius(LAT, LON, lats, lons, radius_km=5.0, exact=True)
+    assert list(in_radius) == [True, True, False, False]
+    assert np.allclose(distances[:3], [1.0, 4.99, 5.01], atol=1e-6)
+
+    approx, _ = within_radius(LAT, LON, lats, lons, radius_km=5.0)
+    assert list(approx) == [True, True, True, False]
+
+
+def test_within_radius_takes_pandas_columns():
+    import pandas as pd
+    lats, lons = _ring([1.0, 9.0])
+    df = pd.DataFrame({"LATITUDE": lats, "LONGITUDE": lons}, index=[10, 20])
+    in_radius, df["DISTANCE"] = within_radius(LAT, LON, df["LATITUDE"], df["LONGITUDE"], exact=True)
+    assert list(df[in_radius].index) == [10]
+
+
+def test_radius_query_matches_a_full_scan():
+    rng = np.random.default_rng(0)
+    lats = LAT + rng.uniform(-0.2, 0.2, 5000)
+    lons = LON + rng.uniform(-0.2, 0.2, 5000)
+    tree = build_geo_index(lats, lons)
+
+    rows = radius_query(tree, LAT, LON, radius_km=5.0)
+    scan, _ = within_radius(LAT, LON, lats, lons, radius_km=5.0)
+    assert 0 < len(rows) < len(lats)
+    assert sorted(rows) == list(np.flatnonzero(scan))
+
+    rows = radius_query(tree, LAT, LON, radius_km=5.0, exact=True)
+    scan, _ = within_radius(LAT, LON, lats, lons, radius_km=5.0, exact=True)
+    assert sorted(rows) == list(np.flatnonzero(scan))
+
+
+def test_radius_query_exact_uses_geodesic_at_the_edge():
+    lats, lons = _ring([1.0, 4.99, 5.01, 6.0], bearing_deg=90.0)
+    tree = build_geo_index(lats, lons)
+
+    assert sorted(radius_query(tree, LAT, LON, radius_km=5.0)) == [0, 1, 2]
+    assert sorted(radius_query(tree, LAT, LON, radius_km=5.0, exact=True)) == [0, 1]
+    assert len(radius_query(tree, 0.0, 0.0, radius_km=5.0, exact=True)) == 0
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from utils.geocode import build_gazetteer, load_gazetteer, resolve_location, get_lat_lon
+
+PLACES = pd.DataFrame(
+    [
+        ("Emmaus", "PA", "18049", 40.54, -75.50, 10),
+        ("Emma", "MO", "65327", 38.97, -93.49, 2),
+        ("Columbus", "OH", "43215", 39.96, -83.00, 30),
+        ("Columbus", "IN", "47201", 39.20, -85.92, 5),
+        ("Tampa", "FL", "33602", 27.95, -82.46, 40),
+        ("Tampa", "FL", "33606", 27.93, -82.48, 20),
+        ("Philadelphia", "PA", "19103", 39.95, -75.17, 50),
+    ],
+    columns=["CITY", "STATE", "POSTAL_CODE", "LATITUDE", "LONGITUDE", "BUSINESSES"],
+)
+
+
+@pytest.fixture(scope="module")
+def gazetteer(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("gazetteer") / "gazetteer.json")
+    build_gazetteer(PLACES, path=path)
+    return load_gazetteer(path)
+
+
+def _rounded(lat_lon):
+    return tuple(round(v, 2) for v in lat_lon)
+
+
+@pytest.mark.parametrize("query", ["Emmaus", "Emmaus, PA", "emmaus pa", "Emmaus, PA, USA", "Emmaus US"])
+def test_city_ending_in_us_is_not_truncated(gazetteer, query):
+    assert _rounded(resolve_location(query, gazetteer)) == (40.54, -75.50)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Columbus, OH", (39.96, -83.00)),
+    ("Columbus, IN", (39.20, -85.92)),
+    ("Columbus", (39.96, -83.00)),  # most businesses wins without a state
+    ("Columbus, OH, United States", (39.96, -83.00)),
+])
+def test_columbus(gazetteer, query, expected):
+    assert _rounded(resolve_location(query, gazetteer)) == expected
+
+
+def test_city_centroid_is_business_weighted(gazetteer):
+    assert _rounded(resolve_location("Tampa, FL", gazetteer)) == (27.94, -82.47)
+
+
+def test_zip_state_and_near_misses(gazetteer):
+    assert _rounded(resolve_location("19103", gazetteer)) == (39.95, -75.17)
+    assert _rounded(resolve_location("Philadelpia", gazetteer)) == (39.95, -75.17)
+    assert resolve_location("Florida", gazetteer) is not None
+
+
+def test_explicit_state_has_to_match(gazetteer):
+    assert resolve_location("Tampa, PA", gazetteer) is None
+    assert resolve_location("123 Nowhere Street", gazetteer) is None
+
+
+def test_offline_miss_returns_none_pair(gazetteer, monkeypatch):
+    monkeypatch.setattr("utils.geocode.load_gazetteer", lambda: gazetteer)
+    assert get_lat_lon("123 Nowhere Street", allow_network=False) == (None, None)
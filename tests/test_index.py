@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import faiss
+import pytest
+
+from utils.index import (
+    INDEX_KINDS, make_index, recall_report, search_params, search_index, exclude_categories,
+    build_index, read_manifest, load_index, load_row_categories,
+)
+
+
+@pytest.fixture(scope="module")
+def embeddings():
+    rng = np.random.default_rng(0)
+    emb = rng.standard_normal((1000, 96)).astype("float32")
+    faiss.normalize_L2(emb)
+    return emb
+
+
+def test_recall_report_covers_every_kind(embeddings):
+    report = recall_report(embeddings, k=10, n_queries=50).set_index("kind")
+
+    assert list(report.index) == list(INDEX_KINDS)
+    assert report.loc["flat", "recall@10"] == 1.0
+    assert report.loc["fp16", "recall@10"] >= 0.99
+    assert report.loc["sq8", "recall@10"] >= 0.9
+    assert (report["recall@10"] > 0).all()
+
+
+def test_storage_modes_shrink_the_codes(embeddings):
+    # Bytes stored per vector, without the (fixed size) PQ codebook
+    sizes = [make_index(embeddings, kind).code_size for kind in ("flat", "fp16", "sq8", "pq")]
+    assert sizes == [96 * 4, 96 * 2, 96, 48]
+
+
+def test_pq_skips_polysemous_training(embeddings):
+    index = make_index(embeddings, "pq")
+    assert not index.do_polysemous_training
+    assert index.ntotal == len(embeddings)
+
+
+def test_approximate_kinds_take_their_search_knobs(embeddings):
+    index = make_index(embeddings, "ivf")
+    assert isinstance(search_params(index, nprobe=3), faiss.SearchParametersIVF)
+    assert search_params(index, nprobe=3).nprobe == 3
+    assert search_params(make_index(embeddings, "hnsw"), ef_search=7).efSearch == 7
+    assert search_params(make_index(embeddings, "flat")) is not None
+
+
+def test_ivf_recall_rises_with_nprobe(embeddings):
+    low = recall_report(embeddings, kinds=["ivf"], n_queries=50, nprobe=1)["recall@10"][0]
+    full = recall_report(embeddings, kinds=["ivf"], n_queries=50, nprobe=10**6)["recall@10"][0]
+    assert low < full == 1.0
+
+
+@pytest.mark.parametrize("kind", list(INDEX_KINDS))
+def test_filtered_search_only_returns_candidates(embeddings, kind):
+    index = make_index(embeddings, kind)
+    row_ids = np.arange(100, 1000, 7)
+    query = embeddings[row_ids[3]][None, :]
+
+    positions, scores = search_index(index, query, row_ids, top_k=5)
+
+    assert len(positions) == len(scores) == 5
+    assert np.all(np.diff(scores) <= 1e-6)
+    # The query is one of the candidates, so every kind should rank it first,
+    # followed by candidates close to it
+    assert row_ids[positions[0]] == row_ids[3]
+    exact = row_ids[np.argsort(-(embeddings[row_ids] @ query[0]))[:20]]
+    assert set(row_ids[positions]) <= set(exact)
+
+
+@pytest.mark.parametrize("kind", list(INDEX_KINDS))
+def test_filtered_search_with_few_candidates(embeddings, kind):
+    # Too few eligible rows for the approximate kinds' visited clusters / neighbours
+    index = make_index(embeddings, kind)
+    row_ids = np.array([5, 512, 999])
+
+    positions, _ = search_index(index, embeddings[:1], row_ids, top_k=5)
+
+    assert sorted(row_ids[positions]) == sorted(row_ids)
+
+
+def test_filtered_search_without_candidates(embeddings):
+    positions, scores = search_index(make_index(embeddings, "flat"), embeddings[:1], [], top_k=5)
+    assert len(positions) == 0 and len(scores) == 0
+
+
+def test_exclude_categories():
+    row_categories = np.array(["Bars, Nightlife", "Mexican, Tacos", "", "Nightlife"])
+    row_ids = np.arange(4)
+
+    assert list(exclude_categories(row_ids, row_categories, [" nightlife "])) == [1, 2]
+    assert list(exclude_categories(row_ids, row_categories, [])) == [0, 1, 2, 3]
+    assert list(exclude_categories(row_ids, None, ["Bars"])) == [0, 1, 2, 3]
+
+
+def test_build_index_writes_the_next_version(embeddings, tmp_path):
+    df = pd.DataFrame({
+        "BUSINESS_ID": [f"b{i}" for i in range(len(embeddings))],
+        "LATITUDE": 39.95, "LONGITUDE": -75.17, "CATEGORIES": "Bars",
+    })
+    index_dir = str(tmp_path)
+
+    assert build_index(df, embeddings, kind="flat", index_dir=index_dir)["version"] == 1
+    manifest = build_index(df, embeddings, kind="sq8", index_dir=index_dir)
+    assert manifest["version"] == read_manifest(index_dir)["version"] == 2
+    assert manifest["kind"] == "sq8" and manifest["count"] == len(embeddings)
+
+    index, business_ids = load_index(index_dir)
+    assert index.ntotal == len(embeddings) and business_ids[7] == "b7"
+    assert list(load_row_categories(index_dir)[:2]) == ["Bars", "Bars"]
+
+
+def test_load_index_without_a_build(tmp_path):
+    with pytest.raises(FileNotFoundError, match="python -m utils.index"):
+        load_index(str(tmp_path))
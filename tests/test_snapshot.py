@@ -0,0 +1,127 @@
+import os
+import sys
+import types
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.snapshot import (
+    METADATA_COLUMNS, EMBEDDING_DIM, write_snapshot, read_snapshot, read_manifest, decode_embeddings, sync_snapshot,
+)
+
+
+def _rows(ids, fill=None):
+    meta = pd.DataFrame({c: [f"{c.lower()}-{i}" for i in ids] for c in METADATA_COLUMNS})
+    meta["BUSINESS_ID"] = ids
+    meta["LATITUDE"], meta["LONGITUDE"] = 39.95, -75.17
+    values = [fill if fill is not None else float(int(i[1:])) for i in ids]
+    embeddings = np.repeat(np.array(values, dtype=np.float32)[:, None], EMBEDDING_DIM, axis=1)
+    return meta, embeddings
+
+
+class FakeWarehouse:
+    """BUSINESS_EMBEDDINGS as a dict, answering the queries sync_snapshot sends."""
+
+    def __init__(self, rows):
+        self.rows = rows            # business id -> embedding value
+        self.changed = set()
+        self.changes_fail = False
+        self.clock = 0
+
+    def cursor(self):
+        return self
+
+    def close(self):
+        pass
+
+    def execute(self, sql):
+        self.sql = " ".join(sql.split())
+        if "CHANGES(" in self.sql and "EMBEDDING_F32" not in self.sql and self.changes_fail:
+            raise RuntimeError("change tracking is off")
+
+    def fetchone(self):
+        self.clock += 1
+        return (f"2026-01-01 00:00:0{self.clock}.000000000 +0000",)
+
+    def fetchall(self):
+        return [(business_id,) for business_id in sorted(self.changed)]
+
+    def fetch_pandas_all(self):
+        ids = sorted(self.rows)
+        if "WHERE" in self.sql:
+            ids = [i for i in ids if i in self.changed]
+        meta, _ = _rows(ids)
+        meta["EMBEDDING_F32"] = [np.full(EMBEDDING_DIM, self.rows[i], dtype="<f4").tobytes() for i in ids]
+        return meta
+
+
+@pytest.fixture
+def warehouse(monkeypatch):
+    warehouse = FakeWarehouse({"b1": 1.0, "b2": 2.0, "b3": 3.0})
+    database = types.ModuleType("utils.database")
+    database.get_snowflake_connection = lambda: warehouse
+    monkeypatch.setitem(sys.modules, "utils.database", database)
+    return warehouse
+
+
+def _embedding_by_id(snapshot_dir):
+    meta, embeddings = read_snapshot(snapshot_dir)
+    return dict(zip(meta["BUSINESS_ID"], embeddings[:, 0].tolist()))
+
+
+def test_write_and_read_back(tmp_path):
+    meta, embeddings = _rows(["b1", "b2"])
+    manifest = write_snapshot(meta, embeddings, "t1", "full", str(tmp_path))
+
+    assert manifest["version"] == 1 and manifest["count"] == 2 and manifest["dim"] == EMBEDDING_DIM
+    read_meta, read_embeddings = read_snapshot(str(tmp_path))
+    pd.testing.assert_frame_equal(read_meta, meta)
+    assert read_embeddings.dtype == np.float32 and np.array_equal(read_embeddings, embeddings)
+    assert read_snapshot(str(tmp_path), with_embeddings=False)[1] is None
+
+
+def test_keeps_only_the_current_and_previous_version(tmp_path):
+    for _ in range(3):
+        write_snapshot(*_rows(["b1"]), "t", "full", str(tmp_path))
+    files = sorted(f for f in os.listdir(tmp_path) if f != "manifest.json")
+    assert files == ["businesses_v2.parquet", "businesses_v3.parquet", "embeddings_v2.npy", "embeddings_v3.npy"]
+
+
+def test_decode_embeddings():
+    blobs = [np.arange(EMBEDDING_DIM, dtype="<f4").tobytes()] * 2
+    matrix = decode_embeddings(blobs)
+    assert matrix.shape == (2, EMBEDDING_DIM) and matrix.flags.writeable
+    with pytest.raises(ValueError, match="Embeddings_Snowflake.py"):
+        decode_embeddings([blobs[0], None])
+
+
+def test_incremental_sync_applies_inserts_updates_and_deletes(warehouse, tmp_path):
+    snapshot_dir = str(tmp_path)
+    assert sync_snapshot(snapshot_dir=snapshot_dir)["mode"] == "full"
+
+    warehouse.rows.update(b1=10.0, b4=4.0)
+    del warehouse.rows["b3"]
+    warehouse.changed = {"b1", "b3", "b4"}
+    manifest = sync_snapshot(snapshot_dir=snapshot_dir)
+
+    assert manifest["mode"] == "incremental" and manifest["changed"] == 3
+    assert _embedding_by_id(snapshot_dir) == {"b1": 10.0, "b2": 2.0, "b4": 4.0}
+
+
+def test_sync_without_changes_only_moves_the_sync_point(warehouse, tmp_path):
+    snapshot_dir = str(tmp_path)
+    first = sync_snapshot(snapshot_dir=snapshot_dir)
+    manifest = sync_snapshot(snapshot_dir=snapshot_dir)
+
+    assert manifest["changed"] == 0 and manifest["version"] == first["version"]
+    assert read_manifest(snapshot_dir)["synced_at"] > first["synced_at"]
+
+
+def test_falls_back_to_a_full_reload(warehouse, tmp_path):
+    snapshot_dir = str(tmp_path)
+    sync_snapshot(snapshot_dir=snapshot_dir)
+    warehouse.rows["b2"] = 20.0
+    warehouse.changes_fail = True
+
+    assert sync_snapshot(snapshot_dir=snapshot_dir)["mode"] == "full"
+    assert _embedding_by_id(snapshot_dir) == {"b1": 1.0, "b2": 20.0, "b3": 3.0}